@@ -15,15 +15,16 @@ else
     sleep 3
 fi
 
-# Import data if not already done
+# Incremental sync from the scraped data (research_db) to the analytics schema
 echo ""
-echo "2. Vérification des données dans MongoDB..."
+echo "2. Synchronisation incrémentale des articles scrapés..."
+(cd .. && python3 -m scrapy etl)
 COUNT=$(mongosh --quiet --eval "db.getSiblingDB('recherche_scientifique').articles.countDocuments()" | tail -1)
 if [ "$COUNT" -eq "0" ]; then
-    echo "   ⚠ Aucune donnée trouvée. Import en cours..."
+    echo "   ⚠ Aucune donnée scrapée. Import de l'export Kaggle..."
     mongoimport --db recherche_scientifique --collection articles --file ../data/articles.json --jsonArray
 else
-    echo "   ✓ Données trouvées: $COUNT articles"
+    echo "   ✓ Données disponibles: $COUNT articles"
 fi
 
 # Run Spark analysis
@@ -209,9 +209,15 @@ def run_spider(spider_name):
     script_path = os.path.expanduser("~/BigData-Research-Pipeline/data_scraping")
     venv_python = os.path.expanduser("~/BigData-Research-Pipeline/venv/bin/python")
 
+    # "all": tous les spiders dans un seul processus Scrapy (scrapy crawl_all)
+    if spider_name == "all":
+        command = [venv_python, "-m", "scrapy", "crawl_all"]
+    else:
+        command = [venv_python, "-m", "scrapy", "crawl", spider_name]
+
     try:
         process = subprocess.Popen(
-            [venv_python, "-m", "scrapy", "crawl", spider_name],
+            command,
             cwd=script_path,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -364,7 +370,8 @@ elif page == "Scraping":
             "scholar": "Google Scholar (Rapide)",
             "arxiv": "ArXiv (Recommande)",
             "ieee": "IEEE Xplore",
-            "acm": "ACM Digital Library"
+            "acm": "ACM Digital Library",
+            "all": "Tous (arxiv + ieee + scholar, un seul processus)"
         }
         
         selected_spider = st.selectbox(
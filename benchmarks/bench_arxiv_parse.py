@@ -0,0 +1,94 @@
+"""
+Benchmark: streaming iterparse vs the former ET.fromstring parser for arXiv Atom pages
+
+    python benchmarks/bench_arxiv_parse.py [entries ...]
+"""
+import io
+import os
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from data_scraping.spiders.arxiv_spider import iter_atom_entries  # noqa: E402
+
+ENTRY = """  <entry>
+    <id>http://arxiv.org/abs/2401.{n:05d}v1</id>
+    <updated>2024-01-15T10:30:00Z</updated>
+    <published>2024-01-15T10:30:00Z</published>
+    <title>A study of distributed deep learning systems, part {n}</title>
+    <summary>{summary}</summary>
+    <author><name>Alice Martin</name></author>
+    <author><name>Bob Zhang</name></author>
+    <author><name>Carla Rossi</name></author>
+    <category term="cs.LG" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.DC" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>
+"""
+
+
+def make_feed(entries):
+    summary = "We propose a scalable method for training neural networks. " * 20
+    body = ''.join(ENTRY.format(n=n, summary=summary) for n in range(entries))
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">\n'
+        f'  <opensearch:totalResults>{entries}</opensearch:totalResults>\n'
+        f'{body}</feed>\n'
+    ).encode('utf-8')
+
+
+# Ancien parseur de ArxivSpider.parse (référence)
+def parse_tree(body):
+    root = ET.fromstring(body.decode('utf-8'))
+    ns = {'atom': 'http://www.w3.org/2005/Atom'}
+    for entry in root.findall('atom:entry', ns):
+        title = entry.find('atom:title', ns)
+        link = entry.find('atom:id', ns)
+        authors = entry.findall('atom:author/atom:name', ns)
+        published = entry.find('atom:published', ns)
+        summary = entry.find('atom:summary', ns)
+        categories = entry.findall('atom:category', ns)
+        yield (
+            title.text.strip() if title is not None else None,
+            link.text.strip() if link is not None else None,
+            [a.text.strip() for a in authors if a.text],
+            published.text.strip()[:4] if published is not None else None,
+            summary.text.strip() if summary is not None else None,
+            [c.get('term') for c in categories if c.get('term')],
+        )
+
+
+def parse_stream(body):
+    for entry in iter_atom_entries(io.BytesIO(body), {}):
+        yield (entry['title'], entry['id'], entry['authors'], entry['published'][:4],
+               entry['summary'], entry['categories'])
+
+
+def measure(func, body):
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = 0
+    for _ in func(body):
+        results += 1
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return results, elapsed, peak
+
+
+def main():
+    sizes = [int(n) for n in sys.argv[1:]] or [25, 200, 2000]
+    print(f"{'entries':>8} {'feed MB':>8} | {'tree ms':>9} {'tree peak MB':>13} | {'stream ms':>9} {'stream peak MB':>15}")
+    for size in sizes:
+        body = make_feed(size)
+        assert list(parse_tree(body)) == list(parse_stream(body))
+        _, tree_time, tree_peak = measure(parse_tree, body)
+        _, stream_time, stream_peak = measure(parse_stream, body)
+        print(f"{size:>8} {len(body) / 1e6:>8.2f} | {tree_time * 1000:>9.1f} {tree_peak / 1e6:>13.2f} | "
+              f"{stream_time * 1000:>9.1f} {stream_peak / 1e6:>15.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: compiled taxonomy matcher vs the notebook's regrouper_categories
+
+    python benchmarks/bench_taxonomy.py [rows]
+"""
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from data_scraping.spiders.scholar_spider import ScholarSpider  # noqa: E402
+from data_scraping.taxonomy import TAXONOMY  # noqa: E402
+
+
+# Copie de la fonction du notebook Kaggle (référence)
+def regrouper_categories(cat):
+    cat = str(cat).lower()
+    if 'blockchain' in cat:
+        return 'Blockchain'
+    mots_cles_dl = [
+        'deep learning', 'neural', 'artificial intelligence', 'machine learning',
+        'computer vision', 'natural language', 'reinforcement', 'supervised',
+        'classification', 'regression', 'clustering', 'random forest', 'decision tree',
+        'support vector', 'cnn', 'rnn', 'transfer learning', 'feature engineering',
+        'optimization', 'ensemble', 'gradient boosting'
+    ]
+    if any(mot in cat for mot in mots_cles_dl):
+        return 'Deep Learning'
+    mots_cles_bd = [
+        'big data', 'data science', 'data mining', 'analytics', 'time series',
+        'dimensionality', 'anomaly', 'internet of things', 'cloud', 'distributed',
+        '5g', 'security', 'cybersecurity'
+    ]
+    if any(mot in cat for mot in mots_cles_bd):
+        return 'Big Data'
+    return 'Big Data'
+
+
+def timed(label, func, rows):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed * 1000:9.1f} ms  {rows / elapsed:12,.0f} rows/s")
+    return result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = random.Random(0)
+    keywords = ScholarSpider.keywords + ['Blockchain', 'Cloud Computing', '5G Networks', 'Quantum Computing']
+    series = pd.Series([rng.choice(keywords) for _ in range(rows)])
+
+    legacy = timed("DataFrame.apply(regrouper)", lambda: series.apply(regrouper_categories), rows)
+    compiled = timed("Taxonomy.classify (per row)", lambda: series.map(TAXONOMY.classify), rows)
+    vectorized = timed("Taxonomy.classify_series", lambda: TAXONOMY.classify_series(series), rows)
+    assert legacy.equals(compiled) and legacy.equals(vectorized.astype(legacy.dtype))
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        print("pyarrow not installed, skipping Arrow benchmark")
+        return
+    array = pa.array(series)
+    arrow = timed("Taxonomy.classify_arrow", lambda: TAXONOMY.classify_arrow(array), rows)
+    assert arrow.to_pylist() == legacy.tolist()
+    print("All implementations agree")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+import json
+import os
+
+
+class CheckpointStore:
+    """Small JSON key/value file, rewritten atomically on every update."""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.data = json.load(f)
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        self.data[key] = value
+        self.save()
+
+    def delete(self, key):
+        if self.data.pop(key, None) is not None:
+            self.save()
+
+    def clear(self):
+        self.data = {}
+        self.save()
+
+    def save(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
@@ -0,0 +1 @@
+# Custom scrapy commands (COMMANDS_MODULE)
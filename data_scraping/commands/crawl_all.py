@@ -0,0 +1,54 @@
+import os
+
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+from scrapy.utils.project import data_path
+
+from ..runner import ProgressFeed
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+
+    def syntax(self):
+        return "[options] [spider ...]"
+
+    def short_desc(self):
+        return "Run several spiders in parallel in one process (default: CRAWL_ALL_SPIDERS)"
+
+    def add_options(self, parser):
+        ScrapyCommand.add_options(self, parser)
+        parser.add_argument('--progress-interval', dest='progress_interval', type=float, default=None,
+                            help="seconds between two writes of the progress file (default: PROGRESS_INTERVAL)")
+
+    def run(self, args, opts):
+        names = args or self.settings.getlist('CRAWL_ALL_SPIDERS', ['arxiv', 'ieee', 'scholar'])
+        available = set(self.crawler_process.spider_loader.list())
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise UsageError(f"Unknown spider(s): {', '.join(unknown)}")
+
+        interval = opts.progress_interval or self.settings.getfloat('PROGRESS_INTERVAL', 10.0)
+        # À côté des métriques par spider: .scrapy/metrics/progress.json
+        directory = data_path(self.settings.get('METRICS_DIR', 'metrics'), createdir=True)
+        feed = ProgressFeed(os.path.join(directory, 'progress.json'), interval)
+
+        # Un seul reactor: les spiders partagent le client Mongo, l'index de doublons,
+        # le pool Selenium et les seaux par domaine (voir shared.py)
+        for name in names:
+            crawler = self.crawler_process.create_crawler(name)
+            feed.add(crawler)
+            self.crawler_process.crawl(crawler)
+
+        feed.start()
+        self.crawler_process.join().addBoth(lambda _: feed.stop())
+        self.crawler_process.start()
+
+        progress = feed.snapshot()
+        print(f"\n=== CRAWL ALL ===")
+        for name, row in progress['spiders'].items():
+            print(f"{name}: {row['items']} items, {row['responses']} responses, "
+                  f"{row['errors']} errors ({row['finish_reason']})")
+        print(f"Total: {progress['total']['items']} items in {progress['elapsed_seconds']}s")
+        if any(row['finish_reason'] not in ('finished', None) for row in progress['spiders'].values()):
+            self.exitcode = 1
@@ -0,0 +1,116 @@
+import pymongo
+from pymongo import DeleteMany, UpdateOne
+from scrapy.commands import ScrapyCommand
+
+CHECKPOINT_ID = 'dedup_lien'
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+    default_settings = {'LOG_ENABLED': False}
+
+    def syntax(self):
+        return "[options]"
+
+    def short_desc(self):
+        return "Merge duplicate articles (same lien) and build the unique lien index"
+
+    def add_options(self, parser):
+        ScrapyCommand.add_options(self, parser)
+        parser.add_argument('--batch-size', dest='batch_size', type=int, default=500,
+                            help="duplicate groups merged per bulk write (default: 500)")
+        parser.add_argument('--restart', action='store_true',
+                            help="ignore the saved checkpoint and scan the whole collection again")
+
+    def run(self, args, opts):
+        client = pymongo.MongoClient(self.settings.get('MONGO_URI', 'mongodb://localhost:27017/'))
+        db = client[self.settings.get('MONGO_DATABASE', 'research_db')]
+        articles = db['articles']
+        migrations = db['migrations']
+
+        state = migrations.find_one({'_id': CHECKPOINT_ID}) or {}
+        if opts.restart:
+            state = {}
+        if state.get('done'):
+            print("Deduplication already completed, checking index only")
+            self.ensure_unique_index(articles)
+            client.close()
+            return
+
+        # Les anciens documents n'ont que mot_cle_recherche: on initialise mots_cles
+        backfilled = articles.update_many(
+            {'mots_cles': {'$exists': False}, 'mot_cle_recherche': {'$type': 'string'}},
+            [{'$set': {'mots_cles': ['$mot_cle_recherche']}}]
+        ).modified_count
+        print(f"mots_cles backfilled: {backfilled}")
+
+        last_lien = state.get('last_lien')
+        if last_lien is not None:
+            print(f"Resuming after lien: {last_lien}")
+
+        pipeline = []
+        if last_lien is not None:
+            pipeline.append({'$match': {'lien': {'$gt': last_lien}}})
+        pipeline += [
+            {'$group': {
+                '_id': '$lien',
+                'keep': {'$min': '$_id'},
+                'ids': {'$push': '$_id'},
+                'keywords': {'$addToSet': '$mot_cle_recherche'},
+                'mots_cles': {'$push': '$mots_cles'},
+                'count': {'$sum': 1}
+            }},
+            {'$match': {'count': {'$gt': 1}}},
+            {'$sort': {'_id': 1}}
+        ]
+
+        groups_merged = documents_deleted = 0
+        operations = []
+        for group in articles.aggregate(pipeline, allowDiskUse=True):
+            operations.extend(self.merge_operations(group))
+            groups_merged += 1
+            documents_deleted += group['count'] - 1
+            if groups_merged % opts.batch_size == 0:
+                self.apply(articles, migrations, operations, group['_id'])
+                operations = []
+                print(f"Groups merged: {groups_merged} (documents deleted: {documents_deleted})")
+        if operations:
+            self.apply(articles, migrations, operations, None)
+
+        self.ensure_unique_index(articles)
+        migrations.update_one({'_id': CHECKPOINT_ID}, {'$set': {'done': True}}, upsert=True)
+
+        print(f"\n=== DEDUPLICATION ===")
+        print(f"Duplicate groups merged: {groups_merged}")
+        print(f"Documents deleted: {documents_deleted}")
+        print(f"Total in DB: {articles.count_documents({})}")
+        client.close()
+
+    def merge_operations(self, group):
+        # Garder le plus ancien document et y fusionner les mots-clés des doublons
+        keywords = [k for k in group['keywords'] if k]
+        for mots_cles in group['mots_cles']:
+            if isinstance(mots_cles, list):
+                keywords.extend(mots_cles)
+        others = [_id for _id in group['ids'] if _id != group['keep']]
+        return [
+            UpdateOne({'_id': group['keep']},
+                      {'$addToSet': {'mots_cles': {'$each': list(dict.fromkeys(keywords))}}}),
+            DeleteMany({'_id': {'$in': others}})
+        ]
+
+    def apply(self, articles, migrations, operations, last_lien):
+        articles.bulk_write(operations, ordered=False)
+        # Checkpoint après chaque lot: une interruption reprend au groupe suivant
+        if isinstance(last_lien, str):
+            migrations.update_one({'_id': CHECKPOINT_ID},
+                                  {'$set': {'last_lien': last_lien, 'done': False}}, upsert=True)
+
+    def ensure_unique_index(self, articles):
+        index = articles.index_information().get('lien_1')
+        if index is not None and not index.get('unique'):
+            articles.drop_index('lien_1')
+            index = None
+        if index is None:
+            articles.create_index('lien', unique=True)
+            print("Unique index on lien created")
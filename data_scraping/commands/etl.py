@@ -0,0 +1,46 @@
+import pymongo
+from scrapy.commands import ScrapyCommand
+
+from ..etl import IncrementalETL
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+    default_settings = {'LOG_LEVEL': 'INFO'}
+
+    def syntax(self):
+        return "[options]"
+
+    def short_desc(self):
+        return "Incrementally sync scraped articles into the analytics collection"
+
+    def add_options(self, parser):
+        ScrapyCommand.add_options(self, parser)
+        parser.add_argument('--full', action='store_true',
+                            help="ignore the watermark and reprocess every raw document")
+        parser.add_argument('--batch-size', dest='batch_size', type=int, default=1000,
+                            help="documents per bulk write (default: 1000)")
+
+    def run(self, args, opts):
+        settings = self.settings
+        source_client = pymongo.MongoClient(settings.get('MONGO_URI', 'mongodb://localhost:27017/'))
+        target_client = pymongo.MongoClient(settings.get('ANALYTICS_MONGO_URI', 'mongodb://localhost:27017/'))
+        source = source_client[settings.get('MONGO_DATABASE', 'research_db')]['articles']
+        target_db = target_client[settings.get('ANALYTICS_DATABASE', 'recherche_scientifique')]
+
+        etl = IncrementalETL(
+            source,
+            target_db['articles'],
+            target_db['etl_state'],
+            batch_size=opts.batch_size,
+            lag=settings.getint('ETL_LAG', 60)
+        )
+        etl.run(full=opts.full)
+
+        print(f"\n=== ETL ===")
+        print(f"Raw documents read: {etl.read}")
+        print(f"Articles upserted: {etl.upserted}")
+        print(f"Articles removed: {etl.deleted}")
+        print(f"Total in analytics: {target_db['articles'].estimated_document_count()}")
+        source_client.close()
+        target_client.close()
@@ -0,0 +1,71 @@
+import os
+
+import pymongo
+from scrapy.commands import ScrapyCommand
+from scrapy.utils.project import data_path
+
+from ..spool import SEALED_SUFFIX, claim_segment, pending_segments, read_segment
+from ..storage import ArticleWriter
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+    default_settings = {'LOG_LEVEL': 'WARNING'}
+
+    def syntax(self):
+        return "[options]"
+
+    def short_desc(self):
+        return "Load spool segments left over after a MongoDB outage"
+
+    def add_options(self, parser):
+        ScrapyCommand.add_options(self, parser)
+        parser.add_argument('--include-open', dest='include_open', action='store_true',
+                            help="also load unsealed and claimed segments of a crashed crawl "
+                                 "(no crawl may be running)")
+        parser.add_argument('--keep', action='store_true',
+                            help="keep segment files after loading them")
+
+    def run(self, args, opts):
+        spool_dir = data_path(self.settings.get('SPOOL_DIR', 'spool'), createdir=True)
+        segments = pending_segments(spool_dir, include_open=opts.include_open)
+        if not segments:
+            print(f"No spool segments in {spool_dir}")
+            return
+
+        client = pymongo.MongoClient(self.settings.get('MONGO_URI', 'mongodb://localhost:27017/'))
+        db = client[self.settings.get('MONGO_DATABASE', 'research_db')]
+        writer = ArticleWriter(db['articles'], self.settings.getint('MONGO_BATCH_SIZE', 500))
+        writer.check_index()
+
+        # Les upserts sont idempotents: rejouer un segment déjà chargé ne crée pas de doublon
+        loaded = 0
+        for path in segments:
+            sealed = path if path.endswith(SEALED_SUFFIX) else None
+            if sealed:
+                # Réservé comme le fait le drainer: un crawl en cours ne le chargera pas en même temps
+                path = claim_segment(sealed)
+                if path is None:
+                    print(f"Skipped {os.path.basename(sealed)} (taken by a running drainer)")
+                    continue
+            try:
+                tally = writer.write(list(read_segment(path)))
+            except Exception:
+                if sealed:
+                    os.replace(path, sealed)
+                raise
+            if opts.keep:
+                if sealed:
+                    os.replace(path, sealed)
+            else:
+                os.remove(path)
+            writer.commit(tally)
+            loaded += 1
+            print(f"Loaded {os.path.basename(sealed or path)}")
+
+        print(f"\n=== REPLAY ===")
+        print(f"Segments loaded: {loaded}")
+        print(f"Items inserted: {writer.items_inserted}")
+        print(f"Duplicates merged: {writer.duplicates_merged}")
+        print(f"Write errors: {writer.write_errors}")
+        client.close()
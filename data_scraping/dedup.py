@@ -0,0 +1,176 @@
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import unicodedata
+from array import array
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.project import data_path
+
+from .shared import SHARED
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize_title(title):
+    """NFKC, casefold, punctuation and whitespace collapsed to single spaces."""
+    text = unicodedata.normalize('NFKC', title or '').casefold()
+    return ' '.join(_NON_WORD.sub(' ', text).split())
+
+
+def title_fingerprint(normalized):
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def shingles(normalized, size=5):
+    text = normalized.replace(' ', '')
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm=64, seed=42):
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, shingle_set):
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little')
+            for s in shingle_set
+        ]
+        return array('I', [
+            min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes)
+            for a, b in self.permutations
+        ])
+
+
+def similarity(sig1, sig2):
+    return sum(1 for x, y in zip(sig1, sig2) if x == y) / len(sig1)
+
+
+class NearDuplicateIndex:
+    """On-disk exact-fingerprint map plus MinHash-LSH buckets of canonical titles.
+
+    Each lookup touches one fingerprint row and `bands` bucket rows, so the
+    cost per item does not grow with the number of articles already seen.
+    """
+
+    def __init__(self, path, num_perm=64, bands=16, threshold=0.8, min_shingles=8):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.min_shingles = min_shingles
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(
+            'CREATE TABLE IF NOT EXISTS fingerprints (fingerprint TEXT PRIMARY KEY, canonical TEXT);'
+            'CREATE TABLE IF NOT EXISTS canonicals (canonical TEXT PRIMARY KEY, signature BLOB);'
+            'CREATE TABLE IF NOT EXISTS buckets ('
+            ' band INTEGER, bucket BLOB, canonical TEXT, PRIMARY KEY (band, bucket, canonical));'
+        )
+        self.conn.commit()
+
+    def band_keys(self, signature):
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            yield band, hashlib.blake2b(rows.tobytes(), digest_size=8).digest()
+
+    def find_similar(self, signature):
+        best, best_score = None, self.threshold
+        seen = set()
+        for band, bucket in self.band_keys(signature):
+            for (canonical,) in self.conn.execute(
+                    'SELECT canonical FROM buckets WHERE band = ? AND bucket = ?', (band, bucket)):
+                if canonical in seen:
+                    continue
+                seen.add(canonical)
+                row = self.conn.execute(
+                    'SELECT signature FROM canonicals WHERE canonical = ?', (canonical,)).fetchone()
+                score = similarity(signature, array('I', row[0]))
+                if score >= best_score:
+                    best, best_score = canonical, score
+        return best
+
+    def canonical_for(self, lien, normalized):
+        """Return (fingerprint, canonical lien) and register the title if it is new."""
+        fingerprint = title_fingerprint(normalized)
+        row = self.conn.execute(
+            'SELECT canonical FROM fingerprints WHERE fingerprint = ?', (fingerprint,)).fetchone()
+        if row is not None:
+            return fingerprint, row[0]
+
+        # Titres trop courts: empreinte exacte seulement, la MinHash serait trop bruitée
+        shingle_set = shingles(normalized)
+        signature = self.hasher.signature(shingle_set) if len(shingle_set) >= self.min_shingles else None
+        canonical = self.find_similar(signature) if signature is not None else None
+
+        with self.conn:
+            if canonical is None:
+                canonical = lien
+                if signature is not None:
+                    self.conn.execute('INSERT OR IGNORE INTO canonicals VALUES (?, ?)',
+                                      (canonical, signature.tobytes()))
+                    self.conn.executemany('INSERT OR IGNORE INTO buckets VALUES (?, ?, ?)',
+                                          [(band, bucket, canonical)
+                                           for band, bucket in self.band_keys(signature)])
+            self.conn.execute('INSERT OR IGNORE INTO fingerprints VALUES (?, ?)', (fingerprint, canonical))
+        return fingerprint, canonical
+
+    def close(self):
+        self.conn.close()
+
+
+class NearDuplicatePipeline:
+    """Tag each item with its title fingerprint and the lien of its canonical record."""
+
+    def __init__(self, index, stats, key=None):
+        self.index = index
+        self.stats = stats
+        self.key = key
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('NEAR_DUP_ENABLED', True):
+            raise NotConfigured
+        directory = data_path(settings.get('NEAR_DUP_DIR', 'dedup'), createdir=True)
+        path = os.path.join(directory, 'titles.sqlite')
+        # Index partagé par les spiders d'un même processus (voir scrapy crawl_all)
+        index = SHARED.acquire(('near_dup', path), lambda: NearDuplicateIndex(
+            path,
+            num_perm=settings.getint('NEAR_DUP_NUM_PERM', 64),
+            bands=settings.getint('NEAR_DUP_BANDS', 16),
+            threshold=settings.getfloat('NEAR_DUP_THRESHOLD', 0.8)
+        ))
+        pipeline = cls(index, crawler.stats, key=('near_dup', path))
+        crawler.signals.connect(pipeline.spider_closed, signal=signals.spider_closed)
+        return pipeline
+
+    def process_item(self, item, spider):
+        normalized = normalize_title(item.get('titre'))
+        if not normalized or not item.get('lien'):
+            return item
+
+        fingerprint, canonical = self.index.canonical_for(item['lien'], normalized)
+        item['titre_fingerprint'] = fingerprint
+        item['canonical_lien'] = canonical
+        if canonical != item['lien']:
+            self.stats.inc_value('near_dup/clustered', spider=spider)
+            spider.logger.debug(f"Near-duplicate of {canonical}: {item['titre'][:50]}")
+        return item
+
+    def spider_closed(self):
+        SHARED.release(self.key, lambda index: index.close())
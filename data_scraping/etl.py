@@ -0,0 +1,116 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ASCENDING, DeleteOne, ReplaceOne
+
+from .taxonomy import TAXONOMY
+
+logger = logging.getLogger(__name__)
+
+STATE_ID = 'articles'
+
+
+def project_article(doc):
+    """Map a raw scraped document to the analytics schema, or None if it must be dropped."""
+    try:
+        annee = int(str(doc.get('annee')).strip()[:4])
+    except ValueError:
+        return None
+
+    auteurs = doc.get('auteurs')
+    if isinstance(auteurs, str):
+        auteurs = [a.strip() for a in auteurs.split(',') if a.strip()]
+    elif not isinstance(auteurs, list):
+        auteurs = []
+
+    categorie, categories = TAXONOMY.classify_item(doc)
+
+    return {
+        '_id': str(doc['_id']),
+        'metadata': {
+            'source': doc.get('source'),
+            'journal': doc.get('journal'),
+            'annee': annee
+        },
+        'content': {
+            'titre': doc.get('titre'),
+            'categorie': doc.get('categorie') or categorie,
+            'categories': doc.get('categories') or categories,
+            'auteurs': auteurs or ['Unknown']
+        }
+    }
+
+
+class IncrementalETL:
+    """Copy new or changed raw articles into the analytics collection.
+
+    The watermark is (date_maj, _id) of the last raw document processed: the
+    writer sets date_maj on every insert or keyword merge, so each run only
+    reads the delta since the previous one.
+    """
+
+    def __init__(self, source, target, state, batch_size=1000, lag=60):
+        self.source = source
+        self.target = target
+        self.state = state
+        self.batch_size = batch_size
+        self.lag = lag
+        self.upserted = 0
+        self.deleted = 0
+        self.read = 0
+
+    def prepare(self):
+        self.source.create_index([('date_maj', ASCENDING), ('_id', ASCENDING)])
+        # Documents antérieurs à date_maj: même horloge (UTC) que l'ArticleWriter. date_scraping
+        # est une heure locale naïve, la reprendre décalerait le watermark de quelques heures
+        backfilled = self.source.update_many(
+            {'date_maj': None},
+            [{'$set': {'date_maj': '$$NOW'}}]
+        ).modified_count
+        if backfilled:
+            logger.info(f"date_maj backfilled on {backfilled} raw documents")
+
+    def query(self, watermark):
+        # Les écritures très récentes peuvent encore arriver avec une date_maj antérieure
+        upper = datetime.now(timezone.utc) - timedelta(seconds=self.lag)
+        query = {'date_maj': {'$lte': upper}}
+        if watermark:
+            query['$or'] = [
+                {'date_maj': {'$gt': watermark['date_maj']}},
+                {'date_maj': watermark['date_maj'], '_id': {'$gt': watermark['last_id']}}
+            ]
+        return query
+
+    def run(self, full=False):
+        self.prepare()
+        watermark = None if full else self.state.find_one({'_id': STATE_ID})
+        cursor = self.source.find(self.query(watermark)).sort(
+            [('date_maj', ASCENDING), ('_id', ASCENDING)]
+        ).batch_size(self.batch_size)
+
+        operations = []
+        last = None
+        for doc in cursor:
+            self.read += 1
+            article = project_article(doc)
+            if article is None:
+                operations.append(DeleteOne({'_id': str(doc['_id'])}))
+            else:
+                operations.append(ReplaceOne({'_id': article['_id']}, article, upsert=True))
+            last = doc
+            if len(operations) >= self.batch_size:
+                self.apply(operations, last)
+                operations = []
+        if operations:
+            self.apply(operations, last)
+
+    def apply(self, operations, last):
+        result = self.target.bulk_write(operations, ordered=False)
+        self.upserted += result.upserted_count + result.matched_count
+        self.deleted += result.deleted_count
+        # Watermark sauvegardé après chaque lot: une interruption reprend au lot suivant
+        self.state.update_one(
+            {'_id': STATE_ID},
+            {'$set': {'date_maj': last['date_maj'], 'last_id': last['_id'], 'updated_at': datetime.now(timezone.utc)}},
+            upsert=True
+        )
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.utils.project import data_path
+
+from .shared import SHARED
+
+
+def json_values(response, path):
+    """Values at a dotted path of a JSON body; lists are traversed element by element."""
+    try:
+        values = [json.loads(response.text)]
+    except ValueError:
+        return []
+    for key in path.split('.'):
+        found = []
+        for value in values:
+            for element in (value if isinstance(value, list) else [value]):
+                if isinstance(element, dict) and key in element:
+                    found.append(element[key])
+        values = found
+    return [v for value in values for v in (value if isinstance(value, list) else [value])]
+
+
+class FreshnessStore:
+    """SQLite store of request fingerprints with last fetch time and result-set hash."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS requests ('
+            ' fingerprint TEXT PRIMARY KEY,'
+            ' spider TEXT,'
+            ' url TEXT,'
+            ' fetched_at REAL,'
+            ' result_hash TEXT)'
+        )
+        self.conn.commit()
+
+    def get(self, fingerprint):
+        return self.conn.execute(
+            'SELECT fetched_at, result_hash FROM requests WHERE fingerprint = ?', (fingerprint,)
+        ).fetchone()
+
+    def record(self, fingerprint, spider, url, result_hash):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO requests (fingerprint, spider, url, fetched_at, result_hash)'
+            ' VALUES (?, ?, ?, ?, ?)',
+            (fingerprint, spider, url, time.time(), result_hash)
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class FreshnessMiddleware:
+    """Drop requests fetched less than FRESHNESS_TTL seconds ago.
+
+    Requests set meta['freshness_results'] to a CSS selector listing the
+    results of the page, or to 'json:<path>' (e.g. 'json:records.articleNumber')
+    for JSON responses. A page is recorded only when that selector finds
+    results, so a CAPTCHA or empty page is fetched again next time. When the
+    selected values hash to the same value as the previous crawl,
+    meta['freshness_unchanged'] is set so the spider can stop paginating.
+    """
+
+    def __init__(self, store, fingerprinter, ttls, default_ttl, stats, key=None):
+        self.store = store
+        self.key = key
+        self.fingerprinter = fingerprinter
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('FRESHNESS_ENABLED', True):
+            raise NotConfigured
+        directory = data_path(settings.get('FRESHNESS_DIR', 'freshness'), createdir=True)
+        path = os.path.join(directory, 'requests.sqlite')
+        store = SHARED.acquire(('freshness', path), lambda: FreshnessStore(path))
+        middleware = cls(
+            store,
+            crawler.request_fingerprinter,
+            settings.getdict('FRESHNESS_TTL'),
+            settings.getfloat('FRESHNESS_DEFAULT_TTL', 0),
+            crawler.stats,
+            key=('freshness', path)
+        )
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def ttl_for(self, spider):
+        return float(self.ttls.get(spider.name, self.default_ttl))
+
+    def process_request(self, request, spider):
+        ttl = self.ttl_for(spider)
+        if not ttl or request.meta.get('dont_check_freshness'):
+            return None
+
+        row = self.store.get(self.fingerprinter.fingerprint(request).hex())
+        if row is not None and time.time() - row[0] < ttl:
+            self.stats.inc_value('freshness/skipped', spider=spider)
+            raise IgnoreRequest(f"Fetched less than {ttl:.0f}s ago: {request.url}")
+        return None
+
+    def process_response(self, request, response, spider):
+        if response.status != 200 or not self.ttl_for(spider):
+            return response
+
+        selector = request.meta.get('freshness_results')
+        result_hash = self.result_hash(response, selector) if selector else None
+        if not result_hash:
+            # CAPTCHA ou page vide: ne pas la tenir pour fraîche pendant tout le TTL
+            return response
+
+        fingerprint = self.fingerprinter.fingerprint(request).hex()
+        previous = self.store.get(fingerprint)
+        if previous is not None and previous[1] == result_hash:
+            request.meta['freshness_unchanged'] = True
+            self.stats.inc_value('freshness/unchanged', spider=spider)
+        self.store.record(fingerprint, spider.name, request.url, result_hash)
+        return response
+
+    def result_hash(self, response, selector):
+        if selector.startswith('json:'):
+            keys = json_values(response, selector[5:])
+        else:
+            keys = response.css(selector).getall()
+        keys = [str(k).strip() for k in keys if k is not None and str(k).strip()]
+        if not keys:
+            return None
+        return hashlib.sha1('\n'.join(keys).encode('utf-8')).hexdigest()
+
+    def spider_closed(self):
+        SHARED.release(self.key, lambda store: store.close())
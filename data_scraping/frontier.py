@@ -0,0 +1,288 @@
+import heapq
+import itertools
+import os
+import pickle
+import socket
+import sqlite3
+import time
+
+from scrapy import signals
+from scrapy.core.scheduler import BaseScheduler
+from scrapy.exceptions import DontCloseSpider
+from scrapy.utils.project import data_path
+from scrapy.utils.request import request_from_dict
+from twisted.internet import task
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class FrontierStore:
+    """SQLite crawl frontier: pending requests, leases and seen fingerprints.
+
+    Several processes can use the same file: a request is leased by one
+    worker (BEGIN IMMEDIATE), deleted once downloaded, and put back in the
+    queue when its lease expires or its worker is gone. Live workers renew
+    their leases, so only a stopped worker's leases expire.
+    """
+
+    def __init__(self, path, owner, lease_timeout):
+        self.owner = owner
+        self.lease_timeout = lease_timeout
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS frontier ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' fingerprint TEXT,'
+            ' url TEXT,'
+            ' priority INTEGER,'
+            ' retries INTEGER,'
+            ' data BLOB,'
+            ' owner TEXT,'
+            ' lease_until REAL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS frontier_order ON frontier (owner, priority DESC, id)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS seen (fingerprint TEXT PRIMARY KEY)')
+
+    def mark_seen(self, fingerprint):
+        """Record the fingerprint; False if it was already there."""
+        return self.conn.execute('INSERT OR IGNORE INTO seen VALUES (?)', (fingerprint,)).rowcount == 1
+
+    def push(self, fingerprint, url, priority, retries, data):
+        self.conn.execute(
+            'INSERT INTO frontier (fingerprint, url, priority, retries, data) VALUES (?, ?, ?, ?, ?)',
+            (fingerprint, url, priority, retries, data)
+        )
+
+    def lease(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.conn.execute(
+                'SELECT id, data FROM frontier WHERE owner IS NULL ORDER BY priority DESC, id LIMIT 1'
+            ).fetchone()
+            if row is not None:
+                self.conn.execute('UPDATE frontier SET owner = ?, lease_until = ? WHERE id = ?',
+                                  (self.owner, time.time() + self.lease_timeout, row[0]))
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        return row
+
+    def ack(self, frontier_id):
+        self.conn.execute('DELETE FROM frontier WHERE id = ? AND owner = ?', (frontier_id, self.owner))
+
+    def renew(self):
+        return self.conn.execute('UPDATE frontier SET lease_until = ? WHERE owner = ?',
+                                 (time.time() + self.lease_timeout, self.owner)).rowcount
+
+    def reclaim(self):
+        """Requeue leases that expired or whose worker (on this host) has exited."""
+        host = self.owner.rsplit(':', 1)[0]
+        dead = []
+        for (owner,) in self.conn.execute('SELECT DISTINCT owner FROM frontier WHERE owner IS NOT NULL'):
+            owner_host, _, pid = owner.rpartition(':')
+            if owner != self.owner and owner_host == host and pid.isdigit() and not pid_alive(int(pid)):
+                dead.append(owner)
+        reclaimed = self.conn.execute(
+            'UPDATE frontier SET owner = NULL, lease_until = NULL WHERE owner IS NOT NULL AND owner != ?'
+            ' AND lease_until < ?', (self.owner, time.time())
+        ).rowcount
+        for owner in dead:
+            reclaimed += self.conn.execute(
+                'UPDATE frontier SET owner = NULL, lease_until = NULL WHERE owner = ?', (owner,)
+            ).rowcount
+        return reclaimed
+
+    def release_own(self):
+        return self.conn.execute(
+            'UPDATE frontier SET owner = NULL, lease_until = NULL WHERE owner = ?', (self.owner,)
+        ).rowcount
+
+    def drop_own(self):
+        return self.conn.execute('DELETE FROM frontier WHERE owner = ?', (self.owner,)).rowcount
+
+    def counts(self):
+        """(pending, leased by other live workers, total rows)."""
+        return self.conn.execute(
+            'SELECT COALESCE(SUM(owner IS NULL), 0),'
+            ' COALESCE(SUM(owner IS NOT NULL AND owner != ? AND lease_until >= ?), 0),'
+            ' COUNT(*) FROM frontier', (self.owner, time.time())
+        ).fetchone()
+
+    def clear(self):
+        self.conn.execute('DELETE FROM frontier')
+        self.conn.execute('DELETE FROM seen')
+
+    def close(self):
+        self.conn.close()
+
+
+class FrontierScheduler(BaseScheduler):
+    """Scrapy scheduler keeping pending requests in <FRONTIER_DIR>/<spider>.sqlite.
+
+    Requests (meta, priority, retry count) are stored with request.to_dict(),
+    so an interrupted crawl resumes from its frontier on the next run; start
+    requests already scheduled by that run are skipped. Several `scrapy crawl`
+    processes of the same spider lease requests from the same file. The
+    frontier is emptied once a crawl finishes normally.
+
+    Pending counts are kept in memory: every FRONTIER_REFRESH_INTERVAL
+    seconds (and when the spider goes idle) the leases of this worker are
+    renewed, expired ones are reclaimed and the counts are read again, to see
+    the requests added by other workers.
+    """
+
+    def __init__(self, crawler, directory, lease_timeout, reset, refresh_interval=10.0):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.fingerprinter = crawler.request_fingerprinter
+        self.directory = directory
+        self.lease_timeout = lease_timeout
+        self.reset = reset
+        self.refresh_interval = refresh_interval
+        self.pending = 0
+        self.leased = 0
+        self.loop = None
+        self.owner = f'{socket.gethostname()}:{os.getpid()}'
+        self.store = None
+        self.spider = None
+        # Requêtes non sérialisables (callback hors spider...): gardées en mémoire
+        self.memory = []
+        self.counter = itertools.count()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        scheduler = cls(
+            crawler,
+            data_path(settings.get('FRONTIER_DIR', 'frontier'), createdir=True),
+            settings.getfloat('FRONTIER_LEASE_TIMEOUT', 120),
+            settings.getbool('FRONTIER_RESET', False),
+            settings.getfloat('FRONTIER_REFRESH_INTERVAL', 10.0)
+        )
+        crawler.signals.connect(scheduler.spider_idle, signal=signals.spider_idle)
+        crawler.signals.connect(scheduler.request_done, signal=signals.response_received)
+        crawler.signals.connect(scheduler.request_done, signal=signals.request_left_downloader)
+        return scheduler
+
+    def open(self, spider):
+        self.spider = spider
+        self.store = FrontierStore(os.path.join(self.directory, f'{spider.name}.sqlite'),
+                                   self.owner, self.lease_timeout)
+        if self.reset:
+            self.store.clear()
+        reclaimed = self.refresh()
+        if self.pending or self.leased:
+            spider.logger.info(f"Frontier: resuming with {self.pending} pending requests "
+                               f"({reclaimed} reclaimed, {self.leased} leased by other workers)")
+        self.stats.set_value('frontier/resumed', self.pending, spider=spider)
+        self.loop = task.LoopingCall(self.refresh)
+        self.loop.start(self.refresh_interval, now=False)
+
+    def refresh(self):
+        self.store.renew()
+        reclaimed = self.store.reclaim()
+        self.pending, self.leased, _ = self.store.counts()
+        return reclaimed
+
+    def close(self, reason):
+        if self.loop is not None and self.loop.running:
+            self.loop.stop()
+        if reason == 'finished':
+            # Requêtes louées mais jamais acquittées (IgnoreRequest en middleware...): traitées
+            self.store.drop_own()
+        else:
+            self.store.release_own()
+        pending, leased, total = self.store.counts()
+        if reason == 'finished' and not total:
+            self.store.clear()
+
+        print(f"\n=== FRONTIER ===")
+        print(f"Enqueued: {self.stats.get_value('frontier/enqueued', 0)}")
+        print(f"Dequeued: {self.stats.get_value('frontier/dequeued', 0)}")
+        print(f"Duplicates filtered: {self.stats.get_value('frontier/filtered', 0)}")
+        print(f"Left in frontier: {total}" + ("" if total else " (cleared)"))
+        self.store.close()
+
+    def has_pending_requests(self):
+        return bool(self.memory or self.pending > 0 or self.leased)
+
+    def __len__(self):
+        return len(self.memory) + max(self.pending, 0)
+
+    def spider_idle(self, spider):
+        # Avant de fermer: d'autres workers ont pu ajouter des requêtes depuis le dernier relevé
+        self.refresh()
+        if self.pending or self.leased:
+            raise DontCloseSpider
+
+    def enqueue_request(self, request):
+        fingerprint = self.fingerprinter.fingerprint(request).hex()
+        start = request.meta.pop('frontier_start', False)
+        # Requêtes de départ déjà planifiées (par une exécution précédente ou un autre worker): ignorées
+        if (not request.dont_filter or start) and not self.store.mark_seen(fingerprint):
+            self.stats.inc_value('frontier/filtered', spider=self.spider)
+            self.spider.logger.debug(f"Filtered duplicate request: {request}")
+            return False
+
+        try:
+            state = request.to_dict(spider=self.spider)
+            state['meta'].pop('frontier_id', None)
+            data = pickle.dumps(state, protocol=4)
+        except (ValueError, TypeError, AttributeError, pickle.PicklingError) as e:
+            self.spider.logger.warning(f"Frontier: keeping {request} in memory ({e})")
+            heapq.heappush(self.memory, (-request.priority, next(self.counter), request))
+            self.stats.inc_value('frontier/unserializable', spider=self.spider)
+            return True
+
+        self.store.push(fingerprint, request.url, request.priority,
+                        request.meta.get('retry_times', 0), data)
+        self.pending += 1
+        self.stats.inc_value('frontier/enqueued', spider=self.spider)
+        return True
+
+    def next_request(self):
+        if self.memory:
+            return heapq.heappop(self.memory)[2]
+        if self.pending <= 0:
+            return None
+        row = self.store.lease()
+        if row is None:
+            # Pris par un autre worker: le prochain refresh() relira les compteurs
+            self.pending = 0
+            return None
+        self.pending -= 1
+        frontier_id, data = row
+        request = request_from_dict(pickle.loads(data), spider=self.spider)
+        request.meta['frontier_id'] = frontier_id
+        self.stats.inc_value('frontier/dequeued', spider=self.spider)
+        return request
+
+    def request_done(self, request, spider, **kwargs):
+        if self.store is not None and 'frontier_id' in request.meta:
+            self.store.ack(request.meta['frontier_id'])
+
+
+class FrontierStartMiddleware:
+    """Spider middleware marking start requests, so a resumed crawl can skip them."""
+
+    def process_start_requests(self, start_requests, spider):
+        for request in start_requests:
+            if hasattr(request, 'meta'):
+                request.meta['frontier_start'] = True
+            yield request
+
+    async def process_start(self, start):
+        async for request in start:
+            if hasattr(request, 'meta'):
+                request.meta['frontier_start'] = True
+            yield request
@@ -16,3 +16,10 @@ class ArticleItem(scrapy.Item):
     latitude = scrapy.Field()
     longitude = scrapy.Field()
     date_pub = scrapy.Field()
+    affiliations = scrapy.Field()
+    # Taxonomy groups (taxonomy.TaxonomyPipeline)
+    categorie = scrapy.Field()
+    categories = scrapy.Field()
+    # Near-duplicate detection (dedup.NearDuplicatePipeline)
+    titre_fingerprint = scrapy.Field()
+    canonical_lien = scrapy.Field()
@@ -0,0 +1,245 @@
+import json
+import os
+import re
+import time
+from collections import defaultdict
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.project import data_path
+from twisted.internet import task
+
+# Secondes: du parsing (ms) jusqu'au rendu Selenium (dizaines de secondes)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_KEY = re.compile(r'^metrics/(hist|counter)/([a-zA-Z_][\w]*)(\{.*\})?(?:/(le=[^/]+|sum|count))?$')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    parts = []
+    for name in sorted(labels):
+        value = str(labels[name]).replace('\\', '\\\\').replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+def observe(stats, name, value, **labels):
+    """Record value in the cumulative histogram `name` kept in the Scrapy stats."""
+    key = f'metrics/hist/{name}{_labels(labels)}'
+    for bound in BUCKETS:
+        if value <= bound:
+            stats.inc_value(f'{key}/le={bound}')
+    stats.inc_value(f'{key}/count')
+    stats.inc_value(f'{key}/sum', value, start=0.0)
+
+
+def count(stats, name, value=1, **labels):
+    stats.inc_value(f'metrics/counter/{name}{_labels(labels)}', value)
+
+
+def parse_labels(text):
+    return dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', text or ''))
+
+
+def collect(stats):
+    """Group the metrics/* stats into histograms and counters."""
+    histograms = defaultdict(lambda: {'buckets': {}, 'count': 0, 'sum': 0.0})
+    counters = {}
+    # Copie: le thread du spool et les threads Selenium ajoutent des clés pendant le parcours
+    for key, value in dict(stats.get_stats()).items():
+        match = _KEY.match(key) if isinstance(key, str) else None
+        if match is None:
+            continue
+        kind, name, labels, suffix = match.groups()
+        if kind == 'counter':
+            counters[(name, labels or '')] = value
+            continue
+        hist = histograms[(name, labels or '')]
+        if suffix == 'count':
+            hist['count'] = value
+        elif suffix == 'sum':
+            hist['sum'] = value
+        elif suffix:
+            hist['buckets'][float(suffix[3:])] = value
+    return histograms, counters
+
+
+def quantile(hist, q):
+    """Upper bound of the bucket holding the q-quantile (None if above the last bucket)."""
+    target = q * hist['count']
+    for bound in BUCKETS:
+        if hist['buckets'].get(bound, 0) >= target:
+            return bound
+    return None
+
+
+def derived_gauges(counters, elapsed):
+    """items/s per source and keyword, duplicate ratio per source."""
+    gauges = {}
+    for (name, labels), value in counters.items():
+        if name == 'items_scraped_total' and elapsed > 0:
+            gauges[('items_per_second', labels)] = value / elapsed
+    for (name, labels), inserted in counters.items():
+        if name != 'db_items_inserted_total':
+            continue
+        merged = counters.get(('db_items_merged_total', labels), 0)
+        total = inserted + merged
+        gauges[('duplicate_ratio', labels)] = merged / total if total else 0.0
+    return gauges
+
+
+def prometheus_text(histograms, counters, gauges):
+    lines = []
+    for name in sorted({n for n, _ in histograms}):
+        lines.append(f'# TYPE scrapy_{name} histogram')
+        for (hist_name, labels), hist in sorted(histograms.items()):
+            if hist_name != name:
+                continue
+            label_map = parse_labels(labels)
+            for bound in BUCKETS:
+                lines.append(f'scrapy_{name}_bucket{_labels({**label_map, "le": bound})} '
+                             f'{hist["buckets"].get(bound, 0)}')
+            lines.append(f'scrapy_{name}_bucket{_labels({**label_map, "le": "+Inf"})} {hist["count"]}')
+            lines.append(f'scrapy_{name}_sum{labels} {hist["sum"]}')
+            lines.append(f'scrapy_{name}_count{labels} {hist["count"]}')
+    for kind, values in (('counter', counters), ('gauge', gauges)):
+        for name in sorted({n for n, _ in values}):
+            lines.append(f'# TYPE scrapy_{name} {kind}')
+            for (metric, labels), value in sorted(values.items()):
+                if metric == name:
+                    lines.append(f'scrapy_{name}{labels} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def _write_atomic(path, content):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+class CrawlMetrics:
+    """Collect per-source/per-keyword crawl metrics into the Scrapy stats.
+
+    Every METRICS_INTERVAL seconds (and at the end of the crawl) the metrics
+    are written to <METRICS_DIR>/<spider>.prom in Prometheus text format and
+    to <spider>.json.
+    """
+
+    def __init__(self, stats, directory, interval):
+        self.stats = stats
+        self.directory = directory
+        self.interval = interval
+        self.started = None
+        self.loop = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('METRICS_ENABLED', True):
+            raise NotConfigured
+        extension = cls(
+            crawler.stats,
+            data_path(settings.get('METRICS_DIR', 'metrics'), createdir=True),
+            settings.getfloat('METRICS_INTERVAL', 30.0)
+        )
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(extension.response_received, signal=signals.response_received)
+        crawler.signals.connect(extension.item_scraped, signal=signals.item_scraped)
+        return extension
+
+    def spider_opened(self, spider):
+        self.started = time.monotonic()
+        self.loop = task.LoopingCall(self.dump, spider)
+        self.loop.start(self.interval, now=False)
+
+    def spider_closed(self, spider):
+        if self.loop is not None and self.loop.running:
+            self.loop.stop()
+        self.dump(spider)
+
+    def response_received(self, response, request, spider):
+        labels = {'source': spider.name, 'keyword': request.meta.get('keyword', '')}
+        if 'selenium_render_time' in request.meta:
+            observe(self.stats, 'selenium_render_seconds', request.meta['selenium_render_time'], **labels)
+        elif 'pydoll_render_time' in request.meta:
+            observe(self.stats, 'pydoll_render_seconds', request.meta['pydoll_render_time'], **labels)
+        elif 'download_latency' in request.meta:
+            observe(self.stats, 'fetch_latency_seconds', request.meta['download_latency'], **labels)
+        count(self.stats, 'responses_total', status=response.status, **labels)
+
+    def item_scraped(self, item, response, spider):
+        count(self.stats, 'items_scraped_total', source=spider.name, keyword=item.get('mot_cle_recherche', ''))
+
+    def dump(self, spider):
+        elapsed = time.monotonic() - self.started
+        histograms, counters = collect(self.stats)
+        gauges = derived_gauges(counters, elapsed)
+        for (name, labels), value in gauges.items():
+            self.stats.set_value(f'metrics/gauge/{name}{labels}', round(value, 4))
+
+        _write_atomic(os.path.join(self.directory, f'{spider.name}.prom'),
+                      prometheus_text(histograms, counters, gauges))
+        _write_atomic(os.path.join(self.directory, f'{spider.name}.json'), json.dumps({
+            'spider': spider.name,
+            'elapsed_seconds': round(elapsed, 3),
+            'histograms': [
+                {'name': name, 'labels': parse_labels(labels), 'count': h['count'],
+                 'sum': h['sum'], 'buckets': {str(b): h['buckets'].get(b, 0) for b in BUCKETS}}
+                for (name, labels), h in sorted(histograms.items())
+            ],
+            'counters': [
+                {'name': name, 'labels': parse_labels(labels), 'value': value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+            'gauges': [
+                {'name': name, 'labels': parse_labels(labels), 'value': value}
+                for (name, labels), value in sorted(gauges.items())
+            ],
+        }, indent=2, ensure_ascii=False))
+
+
+class ParseTimingMiddleware:
+    """Spider middleware timing the spider callbacks (time spent producing output)."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('METRICS_ENABLED', True):
+            raise NotConfigured
+        return cls(crawler.stats)
+
+    def process_spider_output(self, response, result, spider):
+        elapsed = 0.0
+        iterator = iter(result)
+        while True:
+            start = time.perf_counter()
+            try:
+                output = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                elapsed += time.perf_counter() - start
+            yield output
+        observe(self.stats, 'parse_seconds', elapsed,
+                source=spider.name, keyword=response.meta.get('keyword', ''))
+
+    async def process_spider_output_async(self, response, result, spider):
+        elapsed = 0.0
+        iterator = result.__aiter__()
+        while True:
+            start = time.perf_counter()
+            try:
+                output = await iterator.__anext__()
+            except StopAsyncIteration:
+                break
+            finally:
+                elapsed += time.perf_counter() - start
+            yield output
+        observe(self.stats, 'parse_seconds', elapsed,
+                source=spider.name, keyword=response.meta.get('keyword', ''))
@@ -1,59 +1,204 @@
 import pymongo
+from scrapy.exceptions import DropItem, NotConfigured
+from scrapy.utils.project import data_path
+from twisted.internet import task
 from datetime import datetime
-import hashlib
+import os
+import shutil
+import time
+import uuid
+
+from .shared import SHARED
+from .spool import SpoolDrainer, SpoolWriter, pending_segments
+from .storage import ArticleWriter
+
 
 class MongoPipeline:
-    def __init__(self, mongo_uri, mongo_db):
+    def __init__(self, mongo_uri, mongo_db, spool_dir, batch_size=500, flush_interval=5.0,
+                 drain_timeout=30.0, stats=None):
         self.mongo_uri = mongo_uri
         self.mongo_db = mongo_db
-        self.duplicates_skipped = 0
-        self.items_inserted = 0
+        self.spool_dir = spool_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drain_timeout = drain_timeout
+        self.stats = stats
+        self.flush_loop = None
 
     @classmethod
     def from_crawler(cls, crawler):
         return cls(
             mongo_uri=crawler.settings.get('MONGO_URI', 'mongodb://localhost:27017/'),
-            mongo_db=crawler.settings.get('MONGO_DATABASE', 'research_db')
+            mongo_db=crawler.settings.get('MONGO_DATABASE', 'research_db'),
+            spool_dir=data_path(crawler.settings.get('SPOOL_DIR', 'spool'), createdir=True),
+            batch_size=crawler.settings.getint('MONGO_BATCH_SIZE', 500),
+            flush_interval=crawler.settings.getfloat('MONGO_FLUSH_INTERVAL', 5.0),
+            drain_timeout=crawler.settings.getfloat('SPOOL_DRAIN_TIMEOUT', 30.0),
+            stats=crawler.stats
         )
 
     def open_spider(self, spider):
-        self.client = pymongo.MongoClient(self.mongo_uri)
-        self.db = self.client[self.mongo_db]
-        # Drop existing index if it exists and recreate
-        try:
-            self.db['articles'].drop_index('lien_1')
-        except:
-            pass
-        # Remove duplicates before creating unique index
-        pipeline = [
-            {"$group": {"_id": "$lien", "uniqueIds": {"$addToSet": "$_id"}, "count": {"$sum": 1}}},
-            {"$match": {"count": {"$gt": 1}}}
-        ]
-        duplicates = list(self.db['articles'].aggregate(pipeline))
-        for doc in duplicates:
-            # Keep first, delete rest
-            ids_to_delete = doc['uniqueIds'][1:]
-            self.db['articles'].delete_many({"_id": {"$in": ids_to_delete}})
-        # Create unique index
-        self.db['articles'].create_index('lien', unique=True)
+        # Le client se connecte en arrière-plan: un MongoDB absent ne bloque pas le crawl.
+        # Un seul client (pool de connexions) pour tous les spiders du processus
+        self.client = SHARED.acquire(('mongo', self.mongo_uri), lambda: pymongo.MongoClient(
+            self.mongo_uri, serverSelectionTimeoutMS=5000))
+        self.writer = ArticleWriter(self.client[self.mongo_db]['articles'], self.batch_size,
+                                    stats=self.stats, source=spider.name)
+
+        # Les items passent toujours par le spool local, le thread drainer les écrit dans Mongo
+        self.drainer = SpoolDrainer(self.spool_dir, self.writer, poll_interval=self.flush_interval)
+        self.spool = SpoolWriter(self.spool_dir, spider.name, self.batch_size, on_seal=self.drainer.notify)
+        self.drainer.start()
+
+        # Rotation périodique même si aucun item n'arrive (seuil de temps)
+        self.flush_loop = task.LoopingCall(self.flush_if_due)
+        self.flush_loop.start(self.flush_interval, now=False)
 
     def close_spider(self, spider):
+        if self.flush_loop is not None and self.flush_loop.running:
+            self.flush_loop.stop()
+        self.spool.seal()
+        self.drainer.stop(self.drain_timeout)
         print(f"\n=== STATISTICS ===")
-        print(f"Items inserted: {self.items_inserted}")
-        print(f"Duplicates skipped: {self.duplicates_skipped}")
-        print(f"Total in DB: {self.db['articles'].count_documents({})}")
-        self.client.close()
+        print(f"Items inserted: {self.writer.items_inserted}")
+        print(f"Duplicates merged: {self.writer.duplicates_merged}")
+        print(f"Write errors: {self.writer.write_errors}")
+        print(f"Bulk writes: {self.writer.bulk_writes}")
+        leftover = pending_segments(self.spool_dir)
+        if leftover:
+            print(f"Spool segments not loaded: {len(leftover)} (run 'scrapy replay_spool')")
+        try:
+            print(f"Total in DB: {self.writer.collection.estimated_document_count()}")
+        except pymongo.errors.PyMongoError as e:
+            print(f"Total in DB: unavailable ({e})")
+        SHARED.release(('mongo', self.mongo_uri), lambda client: client.close())
 
     def process_item(self, item, spider):
         item['date_scraping'] = datetime.now()
-        
+        if not item.get('lien'):
+            raise DropItem(f"Missing link: {item.get('titre', 'Unknown')}")
+        self.spool.append(dict(item))
+        return item
+
+    def flush_if_due(self):
+        if self.spool.age() >= self.flush_interval:
+            self.spool.seal()
+
+
+class ParquetPipeline:
+    """Write items to Parquet files partitioned by source/annee (hive layout).
+
+    Rows are buffered per partition and written as one row group every
+    PARQUET_ROW_GROUP_SIZE rows. Files are staged under _staging/ (ignored by
+    Spark and pyarrow) and moved into their partition on close_spider.
+    """
+
+    columns = ['mot_cle_recherche', 'titre', 'lien', 'auteurs', 'abstract', 'journal',
+               'date_scraping', 'country', 'topic', 'latitude', 'longitude', 'date_pub',
+               'categorie', 'categories', 'titre_fingerprint', 'canonical_lien', 'affiliations']
+
+    def __init__(self, root, row_group_size=10000, max_buffered_rows=100000):
+        self.root = root
+        self.row_group_size = row_group_size
+        self.max_buffered_rows = max_buffered_rows
+        self.schema = self.build_schema()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('PARQUET_ENABLED', True):
+            raise NotConfigured
         try:
-            # Try to insert, will fail if duplicate link exists
-            self.db['articles'].insert_one(dict(item))
-            self.items_inserted += 1
-        except pymongo.errors.DuplicateKeyError:
-            # Skip duplicate
-            self.duplicates_skipped += 1
-            spider.logger.debug(f"Duplicate skipped: {item.get('titre', 'Unknown')}")
-        
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise NotConfigured("ParquetPipeline requires pyarrow (pip install pyarrow)")
+        return cls(
+            root=data_path(settings.get('PARQUET_DIR', 'parquet'), createdir=True),
+            row_group_size=settings.getint('PARQUET_ROW_GROUP_SIZE', 10000),
+            max_buffered_rows=settings.getint('PARQUET_MAX_BUFFERED_ROWS', 100000)
+        )
+
+    def build_schema(self):
+        import pyarrow as pa
+
+        types = {
+            'auteurs': pa.list_(pa.string()),
+            'categories': pa.list_(pa.string()),
+            'affiliations': pa.list_(pa.string()),
+            'date_scraping': pa.timestamp('us'),
+            'latitude': pa.float64(),
+            'longitude': pa.float64(),
+        }
+        return pa.schema([(name, types.get(name, pa.string())) for name in self.columns])
+
+    def open_spider(self, spider):
+        self.run_id = f"{spider.name}-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.staging = os.path.join(self.root, '_staging', self.run_id)
+        os.makedirs(self.staging, exist_ok=True)
+        self.buffers = {}
+        self.buffered_rows = 0
+        self.writers = {}
+        self.rows_written = 0
+
+    def partition_of(self, item):
+        def clean(value):
+            return str(value).strip().replace('/', '_').replace('=', '_') if value else '__HIVE_DEFAULT_PARTITION__'
+        return clean(item.get('source')), clean(item.get('annee'))
+
+    def row(self, item):
+        row = {name: item.get(name) for name in self.columns}
+        for name in ('latitude', 'longitude'):
+            try:
+                row[name] = float(row[name]) if row[name] is not None else None
+            except (TypeError, ValueError):
+                row[name] = None
+        for name in ('auteurs', 'categories', 'affiliations'):
+            if row[name] is not None and not isinstance(row[name], list):
+                row[name] = [str(row[name])]
+        for name, value in row.items():
+            if value is not None and name not in ('auteurs', 'categories', 'affiliations', 'date_scraping', 'latitude', 'longitude'):
+                row[name] = str(value)
+        return row
+
+    def process_item(self, item, spider):
+        partition = self.partition_of(item)
+        self.buffers.setdefault(partition, []).append(self.row(item))
+        self.buffered_rows += 1
+        if len(self.buffers[partition]) >= self.row_group_size:
+            self.flush_partition(partition)
+        elif self.buffered_rows >= self.max_buffered_rows:
+            for partition in list(self.buffers):
+                self.flush_partition(partition)
         return item
+
+    def flush_partition(self, partition):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        rows = self.buffers.pop(partition, None)
+        if not rows:
+            return
+        writer = self.writers.get(partition)
+        if writer is None:
+            source, annee = partition
+            path = os.path.join(self.staging, f'source={source}', f'annee={annee}', f'part-{self.run_id}.parquet')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            writer = self.writers[partition] = pq.ParquetWriter(path, self.schema, compression='snappy')
+        writer.write_table(pa.Table.from_pylist(rows, schema=self.schema))
+        self.buffered_rows -= len(rows)
+        self.rows_written += len(rows)
+
+    def close_spider(self, spider):
+        for partition in list(self.buffers):
+            self.flush_partition(partition)
+        for writer in self.writers.values():
+            writer.close()
+
+        # Commit: chaque fichier fini est déplacé (rename atomique) dans sa partition
+        for source, annee in self.writers:
+            relative = os.path.join(f'source={source}', f'annee={annee}', f'part-{self.run_id}.parquet')
+            target = os.path.join(self.root, relative)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(os.path.join(self.staging, relative), target)
+        shutil.rmtree(self.staging, ignore_errors=True)
+        spider.logger.info(f"Parquet: {self.rows_written} rows in {len(self.writers)} partitions under {self.root}")
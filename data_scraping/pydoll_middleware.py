@@ -0,0 +1,153 @@
+import asyncio
+import json
+import time
+from importlib.metadata import PackageNotFoundError, version
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.http import HtmlResponse
+from scrapy.utils.defer import deferred_from_coro
+
+from .rendering import CAPTCHA_PROBE_JS, COOKIE_SELECTOR, EXTRACT_JS, expression, is_captcha, wrap_fragment
+
+
+class PydollMiddleware:
+    """Render meta['pydoll'] requests in Chrome over the DevTools protocol (pydoll).
+
+    Runs on the asyncio reactor: each request gets its own tab and up to
+    PYDOLL_MAX_TABS tabs are awaited concurrently, without threads. Same meta
+    contract as SeleniumMiddleware: wait_selector, wait_time, max_captcha_wait
+    and extract_selector. The browser is started by the first request.
+    """
+
+    def __init__(self, headless=True, max_tabs=3, cloudflare_bypass=True, user_agent=None):
+        self.headless = headless
+        self.max_tabs = max_tabs
+        self.cloudflare_bypass = cloudflare_bypass
+        self.user_agent = user_agent
+        self.browser = None
+        self.tabs = None
+        self.starting = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        try:
+            import pydoll  # noqa: F401
+            installed = version('pydoll-python')
+        except (ImportError, PackageNotFoundError):
+            raise NotConfigured('PydollMiddleware requires pydoll 2.x (pip install "pydoll-python<3")')
+        # API 2.x: Tab.enable_auto_solve_cloudflare_captcha() et la propriété page_source
+        if int(installed.split('.')[0]) >= 3:
+            raise NotConfigured(f'PydollMiddleware requires pydoll 2.x, found {installed} '
+                                f'(pip install "pydoll-python<3")')
+        if not settings.get('TWISTED_REACTOR', '').endswith('AsyncioSelectorReactor'):
+            raise NotConfigured("PydollMiddleware requires the asyncio reactor")
+        middleware = cls(
+            headless=settings.getbool('PYDOLL_HEADLESS', settings.getbool('SELENIUM_HEADLESS', True)),
+            max_tabs=settings.getint('PYDOLL_MAX_TABS', 3),
+            cloudflare_bypass=settings.getbool('PYDOLL_CLOUDFLARE_BYPASS', True),
+            user_agent=settings.get('USER_AGENT')
+        )
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    async def start_browser(self):
+        from pydoll.browser.chromium import Chrome
+        from pydoll.browser.options import ChromiumOptions
+
+        options = ChromiumOptions()
+        if self.headless:
+            options.add_argument('--headless=new')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        if self.user_agent:
+            options.add_argument(f'--user-agent={self.user_agent}')
+        browser = Chrome(options=options)
+        await browser.start()
+        self.browser = browser
+
+    async def ensure_browser(self):
+        # Plusieurs requêtes peuvent arriver avant la fin du démarrage: un seul lancement
+        if self.browser is not None:
+            return
+        if self.starting is None:
+            self.tabs = asyncio.Semaphore(self.max_tabs)
+            self.starting = asyncio.ensure_future(self.start_browser())
+        await asyncio.shield(self.starting)
+
+    async def process_request(self, request, spider):
+        if not request.meta.get('pydoll'):
+            return None
+        await self.ensure_browser()
+        async with self.tabs:
+            tab = await self.browser.new_tab()
+            try:
+                return await self.render(tab, request, spider)
+            finally:
+                await tab.close()
+
+    async def render(self, tab, request, spider):
+        render_start = time.monotonic()
+        wait_selector = request.meta.get('wait_selector')
+        wait_time = request.meta.get('wait_time', 10)
+        max_captcha_wait = request.meta.get('max_captcha_wait', 60)
+
+        if self.cloudflare_bypass:
+            # pydoll clique lui-même la case Turnstile quand elle apparaît
+            await tab.enable_auto_solve_cloudflare_captcha()
+        await tab.go_to(request.url, timeout=wait_time + 20)
+
+        button = await tab.query(COOKIE_SELECTOR, timeout=0, raise_exc=False)
+        if button is not None:
+            try:
+                await button.click()
+                spider.logger.info("✅ Cookies acceptés")
+            except Exception:
+                pass
+
+        if is_captcha(await self.evaluate(tab, CAPTCHA_PROBE_JS)):
+            spider.logger.warning(f"⚠️  CAPTCHA DÉTECTÉ! URL: {request.url}")
+            if self.headless and not self.cloudflare_bypass:
+                spider.logger.error("Mode headless: impossible de résoudre le CAPTCHA")
+            else:
+                # Résolution automatique (Turnstile) ou manuelle dans la fenêtre, vérifiée périodiquement
+                deadline = time.monotonic() + max_captcha_wait
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(2)
+                    if not is_captcha(await self.evaluate(tab, CAPTCHA_PROBE_JS)):
+                        spider.logger.info("✅ CAPTCHA résolu! Continuation...")
+                        break
+                else:
+                    spider.logger.error("❌ Timeout: CAPTCHA non résolu")
+
+        if wait_selector:
+            if await tab.query(wait_selector, timeout=wait_time, raise_exc=False) is not None:
+                spider.logger.info(f"Element '{wait_selector}' found")
+            else:
+                spider.logger.warning(f"Timeout waiting for '{wait_selector}' on {request.url}")
+
+        body = None
+        extract_selector = request.meta.get('extract_selector')
+        if extract_selector:
+            extracted = await self.evaluate(tab, EXTRACT_JS, extract_selector)
+            if extracted:
+                request.meta['pydoll_extracted'] = True
+                body = wrap_fragment(*extracted)
+        if body is None:
+            body = await tab.page_source
+        url = await self.evaluate(tab, 'return location.href;') or request.url
+
+        request.meta['pydoll_render_time'] = time.monotonic() - render_start
+        return HtmlResponse(url, body=body, encoding='utf-8', request=request)
+
+    async def evaluate(self, tab, script, *args):
+        response = await tab.execute_script(expression(script, *args))
+        value = response.get('result', {}).get('result', {}).get('value')
+        return json.loads(value) if isinstance(value, str) else None
+
+    def spider_closed(self):
+        if self.browser is None:
+            return None
+        browser, self.browser = self.browser, None
+        return deferred_from_coro(browser.stop())
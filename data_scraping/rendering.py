@@ -0,0 +1,39 @@
+import json
+from html import escape
+
+COOKIE_SELECTOR = 'button[id*="accept"], button[id*="consent"], .cookie-accept, #onetrust-accept-btn-handler'
+CAPTCHA_WORDS = ['captcha', 'robot', 'verify you are human']
+
+# Sonde CAPTCHA: titre, début du texte visible et widgets connus, au lieu de toute la source
+CAPTCHA_PROBE_JS = """
+const widgets = document.querySelector(
+    'iframe[src*="captcha"], .g-recaptcha, .h-captcha, #challenge-form, #cf-challenge-running');
+const text = document.body ? document.body.innerText.slice(0, 2000) : '';
+return (document.title + ' ' + text + (widgets ? ' captcha' : '')).toLowerCase();
+"""
+
+# outerHTML des éléments correspondant au sélecteur (null si aucun)
+EXTRACT_JS = """
+const nodes = document.querySelectorAll(arguments[0]);
+if (!nodes.length) return null;
+return [document.title, Array.from(nodes, n => n.outerHTML).join('\\n')];
+"""
+
+
+def is_captcha(probe):
+    return any(word in (probe or '') for word in CAPTCHA_WORDS)
+
+
+def wrap_fragment(title, fragment):
+    """Minimal HTML document around the extracted containers (keeps <title>)."""
+    return (f'<html><head><title>{escape(title or "")}</title></head>'
+            f'<body>{fragment}</body></html>')
+
+
+def expression(script, *args):
+    """Wrap a Selenium-style script (arguments[i], return) into a CDP expression.
+
+    The result is JSON-encoded in the page so Runtime.evaluate always returns
+    a string value, whatever the script returns.
+    """
+    return f"JSON.stringify((function() {{{script}}}).apply(null, {json.dumps(list(args))}))"
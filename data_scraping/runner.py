@@ -0,0 +1,82 @@
+import json
+import logging
+import time
+
+from scrapy import signals
+from twisted.internet import task
+
+from .metrics import _write_atomic
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressFeed:
+    """One progress/stats feed for all the crawlers of a CrawlerProcess.
+
+    Every `interval` seconds the per-spider counters and their totals are
+    written to `path` (JSON, replaced atomically) and logged on one line.
+    """
+
+    def __init__(self, path, interval=10.0):
+        self.path = path
+        self.interval = interval
+        self.crawlers = []
+        self.states = {}
+        self.started = None
+        self.loop = None
+
+    def add(self, crawler):
+        name = crawler.spidercls.name
+        self.crawlers.append(crawler)
+        self.states[name] = {'state': 'pending', 'finish_reason': None}
+
+        def opened(spider):
+            self.states[name]['state'] = 'running'
+
+        def closed(spider, reason):
+            self.states[name].update(state='finished', finish_reason=reason)
+            self.write()
+
+        # weak=False: les fonctions locales seraient sinon ramassées par le GC
+        crawler.signals.connect(opened, signal=signals.spider_opened, weak=False)
+        crawler.signals.connect(closed, signal=signals.spider_closed, weak=False)
+
+    def start(self):
+        self.started = time.monotonic()
+        self.loop = task.LoopingCall(self.write)
+        self.loop.start(self.interval, now=False)
+
+    def stop(self):
+        if self.loop is not None and self.loop.running:
+            self.loop.stop()
+        self.write()
+
+    def snapshot(self):
+        elapsed = time.monotonic() - self.started if self.started else 0.0
+        spiders = {}
+        totals = {'items': 0, 'responses': 0, 'requests': 0, 'errors': 0}
+        for crawler in self.crawlers:
+            name = crawler.spidercls.name
+            stats = crawler.stats.get_stats() if getattr(crawler, 'stats', None) else {}
+            row = {
+                'items': stats.get('item_scraped_count', 0),
+                'responses': stats.get('response_received_count', 0),
+                'requests': stats.get('downloader/request_count', 0),
+                'errors': stats.get('log_count/ERROR', 0),
+            }
+            for key, value in row.items():
+                totals[key] += value
+            row['items_per_minute'] = round(row['items'] * 60 / elapsed, 2) if elapsed else 0.0
+            row.update(self.states[name])
+            spiders[name] = row
+        totals['items_per_minute'] = round(totals['items'] * 60 / elapsed, 2) if elapsed else 0.0
+        return {'elapsed_seconds': round(elapsed, 1), 'updated_at': time.time(),
+                'spiders': spiders, 'total': totals}
+
+    def write(self):
+        progress = self.snapshot()
+        _write_atomic(self.path, json.dumps(progress, indent=2, ensure_ascii=False))
+        logger.info("Progress: " + " | ".join(
+            f"{name} {row['state']} {row['items']} items" for name, row in progress['spiders'].items()
+        ) + f" | total {progress['total']['items']} items ({progress['total']['items_per_minute']}/min)")
+        return progress
@@ -1,6 +1,9 @@
 from scrapy import signals
 from scrapy.http import HtmlResponse
+from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.project import data_path
 from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
@@ -8,13 +11,130 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.by import By
 from webdriver_manager.chrome import ChromeDriverManager
+from twisted.internet.threads import deferToThreadPool
+from twisted.python.threadpool import ThreadPool
+from .metrics import BUCKETS, collect, count, observe, parse_labels, quantile
+from .shared import SHARED
+from .rendering import CAPTCHA_PROBE_JS, COOKIE_SELECTOR, EXTRACT_JS, is_captcha, wrap_fragment
+from contextlib import contextmanager
+import json
+import os
+import queue
+import threading
 import time
 import random
 
-class SeleniumMiddleware:
-    def __init__(self, headless=True):
+# Network.setBlockedURLs filtre par motif d'URL: chaque type de ressource -> extensions
+RESOURCE_PATTERNS = {
+    'image': ['*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*'],
+    'font': ['*.woff*', '*.ttf*', '*.otf*', '*.eot*'],
+    'media': ['*.mp4*', '*.webm*', '*.mp3*', '*.m3u8*'],
+    'stylesheet': ['*.css*'],
+}
+
+
+class ResourcePolicy:
+    """Per-domain blocked URL patterns built from SELENIUM_BLOCK_RESOURCES.
+
+    {'default': {'block': ['image', 'font'], 'deny': ['*doubleclick.net*']},
+     'ieeexplore.ieee.org': {'block': ['stylesheet'], 'allow': ['font']}}
+
+    A domain rule extends the default one: its block/deny lists are added,
+    and resource types listed in allow are never blocked.
+    """
+
+    def __init__(self, config):
+        self.default = config.get('default', {})
+        self.domains = {domain: rule for domain, rule in config.items() if domain != 'default'}
+
+    def patterns(self, hostname):
+        rules = [self.default] + [
+            rule for domain, rule in self.domains.items()
+            if hostname == domain or (hostname or '').endswith('.' + domain)
+        ]
+        blocked = {t for rule in rules for t in rule.get('block', [])}
+        blocked -= {t for rule in rules for t in rule.get('allow', [])}
+        patterns = [p for t in sorted(blocked) for p in RESOURCE_PATTERNS.get(t, [])]
+        return patterns + [p for rule in rules for p in rule.get('deny', [])]
+
+
+class BlockingSavings:
+    """Running mean of bytes/time of unblocked pages, per domain (the baseline)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.baselines = {}
+
+    def add_baseline(self, domain, transferred, seconds):
+        with self.lock:
+            n, mean_bytes, mean_seconds = self.baselines.get(domain, (0, 0.0, 0.0))
+            n += 1
+            self.baselines[domain] = (n, mean_bytes + (transferred - mean_bytes) / n,
+                                      mean_seconds + (seconds - mean_seconds) / n)
+
+    def saved(self, domain, transferred, seconds):
+        with self.lock:
+            baseline = self.baselines.get(domain)
+        if baseline is None:
+            return None
+        return max(0.0, baseline[1] - transferred), max(0.0, baseline[2] - seconds)
+
+
+@contextmanager
+def timed(stages, name):
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        stages[name] = stages.get(name, 0.0) + time.monotonic() - start
+
+
+def read_events(driver):
+    """Drain the CDP events buffered in the performance log."""
+    return [json.loads(entry['message']).get('message', {}) for entry in driver.get_log('performance')]
+
+
+class DriverPool:
+    """Up to `size` Chrome instances shared by the rendering threads.
+
+    Browsers are started on demand, the first time a page needs one, so
+    crawls without Selenium requests never start Chrome nor resolve the
+    chromedriver binary.
+    """
+
+    def __init__(self, size, headless=True, cooldown=(0, 0), driver_path=None, cache_dir=None,
+                 profile_dir=None):
+        self.size = size
+        self.headless = headless
+        self.cooldown = cooldown
+        self.driver_path = driver_path
+        self.cache_dir = cache_dir
+        self.profile_dir = profile_dir
+        self.idle = queue.Queue()
+        # Un emplacement par navigateur (profil slot-<n>), None tant qu'il n'est pas démarré
+        self.slots = [None] * size
+        self.lock = threading.Lock()
+
+    def resolve_driver_path(self):
+        # Chemin du chromedriver mis en cache: ChromeDriverManager interroge le réseau
+        if self.driver_path:
+            return self.driver_path
+        cache = os.path.join(self.cache_dir, 'chromedriver_path') if self.cache_dir else None
+        if cache and os.path.exists(cache):
+            with open(cache, encoding='utf-8') as f:
+                path = f.read().strip()
+            if os.path.exists(path):
+                self.driver_path = path
+                return path
+        self.driver_path = ChromeDriverManager().install()
+        if cache:
+            with open(cache, 'w', encoding='utf-8') as f:
+                f.write(self.driver_path)
+        return self.driver_path
+
+    def create_driver(self, slot):
         chrome_options = Options()
-        if headless:
+        if self.headless:
             chrome_options.add_argument('--headless')
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
@@ -26,12 +146,20 @@ class SeleniumMiddleware:
         chrome_options.add_argument('--disable-web-security')
         chrome_options.add_argument('--allow-running-insecure-content')
         chrome_options.add_argument(f'--window-size={random.randint(1200, 1920)},{random.randint(800, 1080)}')
+        # Événements CDP (Page.lifecycleEvent) lus via le log "performance"
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
         
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
+        if self.profile_dir:
+            # Profil persistant (cookies, consentement) propre à chaque navigateur du pool
+            chrome_options.add_argument(f'--user-data-dir={os.path.join(self.profile_dir, f"slot-{slot}")}')
+        
+        driver = webdriver.Chrome(service=Service(self.resolve_driver_path()), options=chrome_options)
+        driver.execute_cdp_cmd('Page.enable', {})
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Page.setLifecycleEventsEnabled', {'enabled': True})
         
         # Scripts anti-détection avancés
-        self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
             'source': '''
                 Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
                 Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
@@ -39,43 +167,182 @@ class SeleniumMiddleware:
                 window.chrome = {runtime: {}};
             '''
         })
+        return driver
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                if self.idle.empty() and None in self.slots:
+                    slot = self.slots.index(None)
+                    driver = self.slots[slot] = self.create_driver(slot)
+                    return driver
+            driver = self.idle.get()
+            if driver is not None:
+                return driver
+            # None: un emplacement a été libéré par discard(), on en redémarre un
+
+    @staticmethod
+    def alive(driver):
+        try:
+            driver.execute_script('return 1;')
+            return True
+        except Exception:
+            return False
+
+    def discard(self, driver):
+        # Session plantée ou déconnectée: le navigateur est remplacé, pas remis dans le pool
+        with self.lock:
+            if driver in self.slots:
+                self.slots[self.slots.index(driver)] = None
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        self.idle.put(None)
+
+    def release(self, driver):
+        # Politesse: le navigateur reste au repos un temps aléatoire, hors du chemin critique
+        delay = random.uniform(*self.cooldown)
+        if delay > 0:
+            timer = threading.Timer(delay, self.idle.put, [driver])
+            timer.daemon = True
+            timer.start()
+        else:
+            self.idle.put(driver)
+
+    def close(self):
+        for driver in self.slots:
+            if driver is None:
+                continue
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self.slots = [None] * self.size
+
+
+class SeleniumMiddleware:
+    """Render meta['selenium'] requests in Chrome without blocking the reactor.
+
+    SELENIUM_POOL_SIZE browsers are driven from a dedicated thread pool of the
+    same size; process_request returns a Deferred fired with the HtmlResponse,
+    so plain HTTP requests keep flowing while pages render.
+
+    With meta['extract_selector'], the response body holds only the outerHTML
+    of the matching elements (plus the page title) instead of page_source.
+
+    A page is ready when meta['wait_selector'] is present or, without a
+    selector, when Chrome reports the page network-idle. The human-like
+    jitter (SELENIUM_POLITENESS_DELAY) is spent after the response is
+    returned, while the browser rests before its next page.
+
+    Heavy resources are blocked with Network.setBlockedURLs according to
+    SELENIUM_BLOCK_RESOURCES. A sample of pages (SELENIUM_BLOCK_SAMPLE_RATE)
+    is rendered unblocked as a baseline, from which the bytes and time saved
+    per blocked page are estimated in the crawl stats.
+    """
+
+    def __init__(self, headless=True, pool_size=2, politeness=(1.0, 3.0), idle_timeout=10,
+                 idle_event='networkAlmostIdle', policy=None, sample_rate=0.05, stats=None,
+                 driver_path=None, cache_dir=None, profile_dir=None):
         self.headless = headless
+        self.idle_timeout = idle_timeout
+        self.idle_event = idle_event
+        self.policy = policy or ResourcePolicy({})
+        self.sample_rate = sample_rate
+        self.stats = stats
+        self.savings = BlockingSavings()
+        # Navigateurs et threads partagés par les spiders d'un même processus (scrapy crawl_all)
+        self.pool = SHARED.acquire('selenium_drivers', lambda: DriverPool(
+            pool_size, headless, cooldown=politeness, driver_path=driver_path,
+            cache_dir=cache_dir, profile_dir=profile_dir))
+        self.threads = SHARED.acquire('selenium_threads', lambda: ThreadPool(
+            minthreads=0, maxthreads=pool_size, name='selenium'))
 
     @classmethod
     def from_crawler(cls, crawler):
-        headless = crawler.settings.get('SELENIUM_HEADLESS', True)
-        middleware = cls(headless)
+        settings = crawler.settings
+        middleware = cls(
+            settings.getbool('SELENIUM_HEADLESS', True),
+            settings.getint('SELENIUM_POOL_SIZE', 2),
+            politeness=tuple(float(d) for d in settings.getlist('SELENIUM_POLITENESS_DELAY', [1.0, 3.0])),
+            idle_timeout=settings.getfloat('SELENIUM_IDLE_TIMEOUT', 10),
+            idle_event=settings.get('SELENIUM_IDLE_EVENT', 'networkAlmostIdle'),
+            policy=ResourcePolicy(settings.getdict('SELENIUM_BLOCK_RESOURCES')),
+            sample_rate=settings.getfloat('SELENIUM_BLOCK_SAMPLE_RATE', 0.05),
+            stats=crawler.stats,
+            driver_path=settings.get('SELENIUM_DRIVER_PATH'),
+            cache_dir=data_path(settings.get('SELENIUM_CACHE_DIR', 'selenium'), createdir=True),
+            profile_dir=(data_path(settings['SELENIUM_PROFILE_DIR'], createdir=True)
+                         if settings.get('SELENIUM_PROFILE_DIR') else None)
+        )
         crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
         return middleware
 
     def process_request(self, request, spider):
-        if request.meta.get('selenium'):
-            # Comportement humain: délai aléatoire avant de charger
-            time.sleep(random.uniform(1, 2))
-            
-            self.driver.get(request.url)
-            
-            wait_selector = request.meta.get('wait_selector')
-            wait_time = request.meta.get('wait_time', 10)
-            max_captcha_wait = request.meta.get('max_captcha_wait', 60)
-            
-            # Attendre le chargement initial
-            time.sleep(random.uniform(2, 3))
-            
-            # Accepter les cookies si présent
+        if not request.meta.get('selenium'):
+            return None
+        if not self.threads.started:
+            self.threads.start()
+        from twisted.internet import reactor
+        return deferToThreadPool(reactor, self.threads, self.render, request, spider)
+
+    def render(self, request, spider):
+        # Exécuté dans un thread du pool: les time.sleep ne bloquent plus le reactor
+        stages = request.meta['selenium_stages'] = {}
+        outcome = request.meta['selenium_outcome'] = {}
+        try:
+            with timed(stages, 'queue'):
+                driver = self.pool.acquire()
+            broken = False
             try:
-                cookie_btn = self.driver.find_element(By.CSS_SELECTOR, 'button[id*="accept"], button[id*="consent"], .cookie-accept, #onetrust-accept-btn-handler')
-                cookie_btn.click()
-                spider.logger.info("✅ Cookies acceptés")
-                time.sleep(2)
-            except:
-                pass
-            
-            # Détecter CAPTCHA
-            page_source = self.driver.page_source.lower()
-            captcha_detected = any(word in page_source for word in ['captcha', 'robot', 'verify you are human'])
-            
-            if captcha_detected:
+                return self.render_with(driver, request, spider, stages, outcome)
+            except WebDriverException:
+                broken = not self.pool.alive(driver)
+                raise
+            finally:
+                if broken:
+                    spider.logger.warning(f"Browser session lost on {request.url}, restarting it")
+                    if self.stats is not None:
+                        count(self.stats, 'selenium_drivers_replaced_total', source=spider.name)
+                    self.pool.discard(driver)
+                else:
+                    self.pool.release(driver)
+        finally:
+            self.record_stages(request, spider, stages, outcome)
+
+    def render_with(self, driver, request, spider, stages, outcome):
+        render_start = time.monotonic()
+        wait_selector = request.meta.get('wait_selector')
+        wait_time = request.meta.get('wait_time', 10)
+        max_captcha_wait = request.meta.get('max_captcha_wait', 60)
+        
+        domain = urlparse_cached(request).hostname
+        # Quelques pages non filtrées servent de référence pour estimer le gain
+        baseline = random.random() < self.sample_rate
+        self.block_resources(driver, [] if baseline else self.policy.patterns(domain))
+        
+        driver.get_log('performance')  # vider les événements de la page précédente
+        events = []
+        # driver.get rend la main au DOMContentLoaded/load (pageLoadStrategy normal)
+        with timed(stages, 'navigate'):
+            driver.get(request.url)
+        
+        # Accepter les cookies si présent, puis attendre la disparition du bandeau
+        with timed(stages, 'cookies'):
+            buttons = driver.find_elements(By.CSS_SELECTOR, COOKIE_SELECTOR)
+            if buttons:
+                try:
+                    buttons[0].click()
+                    WebDriverWait(driver, 2).until(EC.invisibility_of_element(buttons[0]))
+                    spider.logger.info("✅ Cookies acceptés")
+                except Exception:
+                    pass
+        
+        # Détecter CAPTCHA (sonde de quelques Ko, pas la source complète)
+        with timed(stages, 'captcha'):
+            if is_captcha(driver.execute_script(CAPTCHA_PROBE_JS)):
+                outcome['captcha'] = True
                 spider.logger.warning(f"\n{'='*70}")
                 spider.logger.warning("⚠️  CAPTCHA DÉTECTÉ!")
                 spider.logger.warning(f"URL: {request.url}")
@@ -89,8 +356,7 @@ class SeleniumMiddleware:
                     start_time = time.time()
                     while time.time() - start_time < max_captcha_wait:
                         time.sleep(5)
-                        current_source = self.driver.page_source.lower()
-                        if not any(word in current_source for word in ['captcha', 'robot', 'verify you are human']):
+                        if not is_captcha(driver.execute_script(CAPTCHA_PROBE_JS)):
                             spider.logger.info("✅ CAPTCHA résolu! Continuation...")
                             break
                     else:
@@ -98,32 +364,131 @@ class SeleniumMiddleware:
                 else:
                     spider.logger.error("Mode headless: impossible de résoudre le CAPTCHA")
                     spider.logger.error("Utilisez SELENIUM_HEADLESS = False dans settings.py")
-            
-            # Simuler comportement humain: scroll
-            try:
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight/3);")
-                time.sleep(random.uniform(1, 2))
-                self.driver.execute_script("window.scrollTo(0, 0);")
-            except:
-                pass
-            
-            if wait_selector:
+        
+        # Contenu chargé au scroll (lazy loading): seulement si la requête le demande
+        if request.meta.get('scroll'):
+            with timed(stages, 'scroll'):
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        
+        if wait_selector:
+            with timed(stages, 'wait_selector'):
                 try:
-                    WebDriverWait(self.driver, wait_time).until(
+                    WebDriverWait(driver, wait_time).until(
                         EC.presence_of_element_located((By.CSS_SELECTOR, wait_selector))
                     )
                     spider.logger.info(f"Element '{wait_selector}' found")
-                except:
+                except Exception:
+                    outcome['selector_timeout'] = True
                     spider.logger.warning(f"Timeout waiting for '{wait_selector}' on {request.url}")
-            
-            time.sleep(random.uniform(1, 2))
-            
-            return HtmlResponse(
-                self.driver.current_url,
-                body=self.driver.page_source,
-                encoding='utf-8',
-                request=request
-            )
-
-    def spider_closed(self):
-        self.driver.quit()
+        else:
+            with timed(stages, 'network_idle'):
+                if not self.wait_network_idle(driver, self.idle_timeout, events):
+                    spider.logger.debug(f"No {self.idle_event} event within {self.idle_timeout}s on {request.url}")
+        
+        with timed(stages, 'serialize'):
+            body = self.page_body(driver, request.meta.get('extract_selector'), request)
+        request.meta['selenium_render_time'] = stages['total'] = time.monotonic() - render_start
+        events.extend(read_events(driver))
+        self.record_network(events, domain, baseline, request.meta['selenium_render_time'], spider)
+        return HtmlResponse(
+            driver.current_url,
+            body=body,
+            encoding='utf-8',
+            request=request
+        )
+
+    def record_stages(self, request, spider, stages, outcome):
+        if self.stats is None:
+            return
+        domain = urlparse_cached(request).hostname
+        for stage, seconds in stages.items():
+            observe(self.stats, 'selenium_stage_seconds', seconds, source=spider.name, domain=domain, stage=stage)
+        # Pages lentes pour une raison connue, comptées à part
+        if outcome.get('selector_timeout'):
+            count(self.stats, 'selenium_selector_timeouts_total', source=spider.name, domain=domain)
+        if outcome.get('captcha'):
+            count(self.stats, 'selenium_captcha_pages_total', source=spider.name, domain=domain)
+
+    def page_body(self, driver, extract_selector, request):
+        # Seul le conteneur des résultats traverse le pont WebDriver et le parseur
+        if extract_selector:
+            extracted = driver.execute_script(EXTRACT_JS, extract_selector)
+            if extracted:
+                request.meta['selenium_extracted'] = True
+                return wrap_fragment(*extracted)
+        return driver.page_source
+
+    def wait_network_idle(self, driver, timeout, events):
+        """Poll the CDP lifecycle events of the main frame until it is network-idle."""
+        main_frame = driver.execute_cdp_cmd('Page.getFrameTree', {})['frameTree']['frame']['id']
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            for message in read_events(driver):
+                events.append(message)
+                params = message.get('params', {})
+                if (message.get('method') == 'Page.lifecycleEvent' and params.get('frameId') == main_frame
+                        and params.get('name') == self.idle_event):
+                    return True
+            time.sleep(0.1)
+        return False
+
+    def block_resources(self, driver, patterns):
+        # Un seul appel CDP quand la politique change (changement de domaine ou page de référence)
+        if getattr(driver, 'blocked_patterns', None) != patterns:
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+            driver.blocked_patterns = patterns
+
+    def record_network(self, events, domain, baseline, seconds, spider):
+        transferred = 0
+        blocked = 0
+        for message in events:
+            method = message.get('method')
+            params = message.get('params', {})
+            if method == 'Network.loadingFinished':
+                transferred += params.get('encodedDataLength', 0)
+            elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+                blocked += 1
+        if self.stats is None:
+            return
+        mode = 'baseline' if baseline else 'blocked'
+        count(self.stats, 'selenium_bytes_transferred_total', transferred, source=spider.name, domain=domain, mode=mode)
+        count(self.stats, 'selenium_pages_total', source=spider.name, domain=domain, mode=mode)
+        if baseline:
+            self.savings.add_baseline(domain, transferred, seconds)
+            return
+        count(self.stats, 'selenium_blocked_requests_total', blocked, source=spider.name, domain=domain)
+        saved = self.savings.saved(domain, transferred, seconds)
+        if saved is not None:
+            count(self.stats, 'selenium_bytes_saved_total', int(saved[0]), source=spider.name, domain=domain)
+            observe(self.stats, 'selenium_time_saved_seconds', saved[1], source=spider.name, domain=domain)
+
+    def spider_closed(self, spider):
+        self.print_stage_summary(spider)
+        SHARED.release('selenium_threads', lambda threads: threads.stop() if threads.started else None)
+        SHARED.release('selenium_drivers', lambda pool: pool.close())
+
+    def print_stage_summary(self, spider):
+        if self.stats is None:
+            return
+        histograms, counters = collect(self.stats)
+        rows = []
+        for (name, labels), hist in sorted(histograms.items()):
+            label_map = parse_labels(labels)
+            if name == 'selenium_stage_seconds' and label_map.get('source') == spider.name and hist['count']:
+                rows.append((label_map.get('domain', ''), label_map.get('stage', ''), hist))
+        if not rows:
+            return
+        print(f"\n=== SELENIUM STAGES ({spider.name}) ===")
+        print(f"{'domain':<28} {'stage':<14} {'pages':>6} {'mean s':>8} {'p95 s':>8} {'total s':>9}")
+        for domain, stage, hist in rows:
+            p95 = quantile(hist, 0.95)
+            print(f"{domain:<28} {stage:<14} {hist['count']:>6} {hist['sum'] / hist['count']:>8.2f} "
+                  f"{p95 if p95 is not None else '>' + str(BUCKETS[-1]):>8} {hist['sum']:>9.1f}")
+        for (name, labels), value in sorted(counters.items()):
+            label_map = parse_labels(labels)
+            if label_map.get('source') != spider.name:
+                continue
+            if name == 'selenium_selector_timeouts_total':
+                print(f"Selector timeouts on {label_map.get('domain')}: {value}")
+            elif name == 'selenium_captcha_pages_total':
+                print(f"CAPTCHA pages on {label_map.get('domain')}: {value}")
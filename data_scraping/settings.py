@@ -2,23 +2,171 @@ BOT_NAME = 'data_scraping'
 
 SPIDER_MODULES = ['data_scraping.spiders']
 NEWSPIDER_MODULE = 'data_scraping.spiders'
+COMMANDS_MODULE = 'data_scraping.commands'
 
 ROBOTSTXT_OBEY = False
 
 DOWNLOADER_MIDDLEWARES = {
+    'data_scraping.freshness.FreshnessMiddleware': 650,
+    'data_scraping.throttle.TokenBucketMiddleware': 690,
+    'data_scraping.pydoll_middleware.PydollMiddleware': 790,
     'data_scraping.selenium_middleware.SeleniumMiddleware': 800,
 }
 
+# Limite de débit par domaine (jetons/seconde), sans bloquer le reactor
+TOKEN_BUCKETS = {
+    'export.arxiv.org': {'rate': 1 / 3, 'burst': 1},
+}
+
+# Moisson arXiv paginée et reprenable (.scrapy/arxiv/checkpoints.json)
+ARXIV_PAGE_SIZE = 200
+ARXIV_MAX_RESULTS = 1000
+ARXIV_STATE_DIR = 'arxiv'
+# Page vide alors que totalResults annonce la suite: relances avant d'abandonner pour cette exécution
+ARXIV_EMPTY_RETRIES = 3
+# Mode incrémental: tri lastUpdatedDate, arrêt sur la première entrée déjà vue (.scrapy/arxiv/incremental.json)
+ARXIV_INCREMENTAL = False
+
+# Moisson OAI-PMH en masse (scrapy crawl arxiv_oai), jetons de reprise dans .scrapy/arxiv/oai.json
+ARXIV_OAI_URL = 'https://export.arxiv.org/oai2'
+ARXIV_OAI_SET = 'cs'
+ARXIV_OAI_MAX_RETRY_AFTER = 600
+
+# Recherche IEEE: 'api' = endpoint JSON /rest/search (Selenium en secours), 'browser' = Selenium seul
+IEEE_SEARCH_MODE = 'api'
+IEEE_API_URL = 'https://ieeexplore.ieee.org/rest/search'
+IEEE_ROWS_PER_PAGE = 100
+# Étape optionnelle: métadonnées complètes (abstract, affiliations, date) des pages /document/ en HTTP simple
+IEEE_DETAIL_PAGES = False
+IEEE_DETAIL_CONCURRENCY = 4
+IEEE_DETAIL_DELAY = 1.0
+
+# Ne pas recharger une page de résultats crawlée il y a moins de N secondes
+FRESHNESS_ENABLED = True
+FRESHNESS_DIR = 'freshness'
+FRESHNESS_DEFAULT_TTL = 0
+FRESHNESS_TTL = {
+    'ieee': 24 * 3600,
+    'acm': 24 * 3600,
+    'sciencedirect': 24 * 3600,
+}
+
+SPIDER_MIDDLEWARES = {
+    'data_scraping.metrics.ParseTimingMiddleware': 50,
+    'data_scraping.frontier.FrontierStartMiddleware': 60,
+}
+
+# Frontière persistante (.scrapy/frontier/<spider>.sqlite): un crawl interrompu reprend
+# là où il s'était arrêté, et plusieurs processus `scrapy crawl <spider>` se partagent
+# les requêtes. Les baux sont renouvelés toutes les FRONTIER_REFRESH_INTERVAL secondes
+# tant que le worker vit; ceux d'un worker arrêté expirent après FRONTIER_LEASE_TIMEOUT.
+# Vidée à la fin normale du crawl.
+SCHEDULER = 'data_scraping.frontier.FrontierScheduler'
+FRONTIER_DIR = 'frontier'
+FRONTIER_LEASE_TIMEOUT = 120
+FRONTIER_REFRESH_INTERVAL = 10.0
+FRONTIER_RESET = False
+
+EXTENSIONS = {
+    'data_scraping.metrics.CrawlMetrics': 500,
+    'data_scraping.throttle.AdaptiveThrottle': 510,
+}
+
+# Délai/concurrence adaptatifs par domaine (ou slot): accélère tant que les réponses sont
+# saines, recule exponentiellement sur 429/503, CAPTCHA ou page de résultats vide.
+# Le délai de départ est le DOWNLOAD_DELAY du spider.
+ADAPTIVE_THROTTLE_ENABLED = True
+ADAPTIVE_THROTTLE = {
+    'default': {'min_delay': 1.0, 'max_delay': 300.0, 'max_concurrency': 1},
+    # Déjà limité par TOKEN_BUCKETS; max_delay = ARXIV_OAI_MAX_RETRY_AFTER pour les 503 Retry-After
+    'export.arxiv.org': {'min_delay': 0.0, 'max_delay': 600.0},
+    'ieeexplore.ieee.org': {'min_delay': 2.0},
+    'ieee-documents': {'min_delay': 0.5, 'max_concurrency': 4},
+    'dl.acm.org': {'min_delay': 5.0},
+    'www.sciencedirect.com': {'min_delay': 10.0},
+    'scholar.google.com': {'min_delay': 5.0},
+}
+
+# Métriques par source/mot-clé (stats Scrapy + .scrapy/metrics/<spider>.prom/.json)
+METRICS_ENABLED = True
+METRICS_DIR = 'metrics'
+METRICS_INTERVAL = 30.0
+
+# scrapy crawl_all: spiders lancés en parallèle dans un seul processus (un reactor),
+# avec un fichier de progression commun .scrapy/metrics/progress.json
+CRAWL_ALL_SPIDERS = ['arxiv', 'ieee', 'scholar']
+PROGRESS_INTERVAL = 10.0
+
 ITEM_PIPELINES = {
+    'data_scraping.taxonomy.TaxonomyPipeline': 100,
+    'data_scraping.dedup.NearDuplicatePipeline': 200,
     'data_scraping.pipelines.MongoPipeline': 300,
+    'data_scraping.pipelines.ParquetPipeline': 400,
 }
 
+# Doublons inter-sources: empreinte du titre normalisé + MinHash-LSH sur disque
+NEAR_DUP_ENABLED = True
+NEAR_DUP_DIR = 'dedup'
+NEAR_DUP_THRESHOLD = 0.8
+NEAR_DUP_NUM_PERM = 64
+NEAR_DUP_BANDS = 16
+
 MONGO_URI = 'mongodb://localhost:27017/'
 MONGO_DATABASE = 'research_db'
+# Écritures groupées: flush tous les N articles distincts ou toutes les N secondes
+MONGO_BATCH_SIZE = 500
+MONGO_FLUSH_INTERVAL = 5.0
+# Spool local (NDJSON gzip) vidé vers Mongo par un thread: le crawl ne dépend
+# plus de la latence de la base. Les segments restants: scrapy replay_spool
+SPOOL_DIR = 'spool'
+SPOOL_DRAIN_TIMEOUT = 30.0
+
+# Copie Parquet partitionnée source=/annee= (désactivée si pyarrow n'est pas installé)
+PARQUET_ENABLED = True
+PARQUET_DIR = 'parquet'
+PARQUET_ROW_GROUP_SIZE = 10000
+PARQUET_MAX_BUFFERED_ROWS = 100000
+
+# Base analytique (schéma content.*/metadata.*) alimentée par: scrapy etl
+ANALYTICS_MONGO_URI = 'mongodb://localhost:27017/'
+ANALYTICS_DATABASE = 'recherche_scientifique'
+ETL_LAG = 60
 
 DOWNLOAD_DELAY = 3
 RANDOMIZE_DOWNLOAD_DELAY = True
-CONCURRENT_REQUESTS = 1
+# Une requête à la fois par site (politesse), plusieurs sites/slots en parallèle
+CONCURRENT_REQUESTS = 4
+CONCURRENT_REQUESTS_PER_DOMAIN = 1
+
+# Navigateurs Chrome pilotés depuis un pool de threads dédié (ne bloque pas le reactor)
+SELENIUM_POOL_SIZE = 2
+# Chrome n'est lancé qu'à la première requête meta['selenium']; chemin du chromedriver
+# mis en cache dans .scrapy/selenium/ (ou fixé ici pour travailler hors ligne)
+SELENIUM_DRIVER_PATH = None
+SELENIUM_CACHE_DIR = 'selenium'
+# Profil Chrome réutilisé entre exécutions (cookies, consentement), ex. 'selenium-profile'
+SELENIUM_PROFILE_DIR = None
+# Pause aléatoire (s) du navigateur après chaque page, hors latence de la requête
+SELENIUM_POLITENESS_DELAY = [1.0, 3.0]
+# Sans wait_selector: attendre l'événement CDP networkAlmostIdle (ou networkIdle)
+SELENIUM_IDLE_EVENT = 'networkAlmostIdle'
+SELENIUM_IDLE_TIMEOUT = 10
+# Ressources bloquées dans Chrome (CDP Network.setBlockedURLs), par type et par domaine
+SELENIUM_BLOCK_RESOURCES = {
+    'default': {
+        'block': ['image', 'font', 'media'],
+        'deny': ['*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+                 '*facebook.net*', '*hotjar.com*', '*adobedtm.com*', '*newrelic.com*'],
+    },
+    'ieeexplore.ieee.org': {'block': ['stylesheet']},
+}
+# Part des pages rendues sans blocage, référence pour selenium_bytes_saved/time_saved
+SELENIUM_BLOCK_SAMPLE_RATE = 0.05
+
+# Requêtes meta['pydoll']: Chrome piloté en CDP sur le reactor asyncio (pip install "pydoll-python<3")
+PYDOLL_MAX_TABS = 3
+PYDOLL_CLOUDFLARE_BYPASS = True
+# PYDOLL_HEADLESS = True  (par défaut: SELENIUM_HEADLESS)
 
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
 
@@ -0,0 +1,37 @@
+import threading
+
+
+class SharedResources:
+    """Process-wide objects shared by all the crawlers of one process.
+
+    acquire(key, factory) builds the object on first use and counts its
+    users; release(key, close) closes it when the last user is done. With a
+    single crawler this behaves exactly like a private object.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.objects = {}
+
+    def acquire(self, key, factory):
+        with self.lock:
+            entry = self.objects.get(key)
+            if entry is None:
+                entry = self.objects[key] = [factory(), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def release(self, key, close=None):
+        with self.lock:
+            entry = self.objects.get(key)
+            if entry is None:
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            del self.objects[key]
+        if close is not None:
+            close(entry[0])
+
+
+SHARED = SharedResources()
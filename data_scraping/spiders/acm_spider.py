@@ -1,5 +1,6 @@
 import scrapy
 from ..items import ArticleItem
+from ..throttle import results_empty
 
 class AcmSpider(scrapy.Spider):
     name = "acm"
@@ -27,7 +28,9 @@ class AcmSpider(scrapy.Spider):
                     'keyword': keyword,
                     'selenium': True,
                     'wait_time': 15,
-                    'wait_selector': '.search__item, .issue-item'
+                    'wait_selector': '.search__item, .issue-item',
+                    'extract_selector': 'li.search__item, div.issue-item, .search-result, .search-result-item',
+                    'freshness_results': 'li.search__item a::attr(href), div.issue-item a::attr(href)'
                 }
             )
 
@@ -50,6 +53,7 @@ class AcmSpider(scrapy.Spider):
             self.logger.warning(f"No articles found. Saving HTML for debugging...")
             with open(f'debug_acm_{keyword.replace(" ", "_")}.html', 'w', encoding='utf-8') as f:
                 f.write(response.text)
+            self.crawler.signals.send_catch_log(results_empty, response=response, spider=self)
             return
 
         for idx, article in enumerate(articles[:25]):
@@ -0,0 +1,213 @@
+import scrapy
+from scrapy.utils.project import data_path
+from ..items import ArticleItem
+from ..checkpoints import CheckpointStore
+from .arxiv_spider import COUNTRIES
+from urllib.parse import urlencode
+import xml.etree.ElementTree as ET
+import io
+import os
+import random
+
+OAI = '{http://www.openarchives.org/OAI/2.0/}'
+ARXIV = '{http://arxiv.org/OAI/arXiv/}'
+
+
+class ArxivOaiSpider(scrapy.Spider):
+    """Bulk harvest of arXiv metadata through OAI-PMH ListRecords.
+
+    scrapy crawl arxiv_oai -a set=cs -a from_date=2024-01-01 -a until_date=2024-06-30
+
+    The resumption token of each page is checkpointed in
+    .scrapy/arxiv/oai.json, so an interrupted harvest restarts where it
+    stopped. base_url can point to a local OAI-PMH fixture server.
+    """
+    name = "arxiv_oai"
+
+    # Le débit est limité par TOKEN_BUCKETS; les 503 Retry-After d'arXiv sont gérés ici
+    custom_settings = {
+        'DOWNLOAD_DELAY': 0,
+        'CONCURRENT_REQUESTS': 1,
+        'RETRY_HTTP_CODES': [500, 502, 504, 522, 524, 408, 429],
+    }
+    handle_httpstatus_list = [503]
+
+    def __init__(self, set=None, from_date=None, until_date=None, base_url=None, reset=False,
+                 *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_spec = set
+        self.from_date = from_date
+        self.until_date = until_date
+        self.base_url = base_url
+        self.reset = str(reset).lower() in ('1', 'true', 'yes')
+        self.records = 0
+        self.deleted = 0
+
+    def start_requests(self):
+        self.base_url = self.base_url or self.settings.get('ARXIV_OAI_URL', 'https://export.arxiv.org/oai2')
+        self.set_spec = self.set_spec or self.settings.get('ARXIV_OAI_SET', 'cs')
+        self.max_retry_after = self.settings.getint('ARXIV_OAI_MAX_RETRY_AFTER', 600)
+        directory = data_path(self.settings.get('ARXIV_STATE_DIR', 'arxiv'), createdir=True)
+        self.checkpoints = CheckpointStore(os.path.join(directory, 'oai.json'))
+        # Un checkpoint par moisson (set + intervalle de dates)
+        self.harvest_key = f"{self.set_spec}|{self.from_date or ''}|{self.until_date or ''}"
+        if self.reset:
+            self.checkpoints.delete(self.harvest_key)
+
+        state = self.checkpoints.get(self.harvest_key)
+        if state and state.get('token'):
+            self.records = state.get('records', 0)
+            self.logger.info(f"Resuming OAI harvest {self.harvest_key} after {self.records} records")
+            yield self.token_request(state['token'])
+        else:
+            yield self.list_request()
+
+    def list_request(self):
+        params = {'verb': 'ListRecords', 'metadataPrefix': 'arXiv', 'set': self.set_spec}
+        if self.from_date:
+            params['from'] = self.from_date
+        if self.until_date:
+            params['until'] = self.until_date
+        return scrapy.Request(f"{self.base_url}?{urlencode(params)}", callback=self.parse, dont_filter=True)
+
+    def token_request(self, token):
+        params = {'verb': 'ListRecords', 'resumptionToken': token}
+        return scrapy.Request(f"{self.base_url}?{urlencode(params)}", callback=self.parse,
+                              dont_filter=True, meta={'resumption_token': token})
+
+    def parse(self, response):
+        if response.status == 503:
+            yield self.retry_later(response)
+            return
+
+        feed = {}
+        count = 0
+        try:
+            for record in iter_oai_records(io.BytesIO(response.body), feed):
+                if record['deleted']:
+                    self.deleted += 1
+                    continue
+                item = self.record_to_item(record)
+                if item.get('titre') and item.get('lien'):
+                    count += 1
+                    yield item
+        except ET.ParseError as e:
+            self.logger.error(f"Error parsing OAI-PMH page after {count} records: {str(e)}")
+            with open('debug_arxiv_oai.xml', 'wb') as f:
+                f.write(response.body)
+            return
+
+        error = feed.get('error')
+        if error == 'badResumptionToken':
+            # Les jetons expirent: on repart du début de l'intervalle, les upserts absorbent les doublons
+            self.logger.warning("Resumption token expired, restarting the harvest range")
+            self.checkpoints.delete(self.harvest_key)
+            self.records = 0
+            yield self.list_request()
+            return
+        if error and error != 'noRecordsMatch':
+            self.logger.error(f"OAI-PMH error {error}: {feed.get('error_message')}")
+            return
+
+        self.records += count
+        token = feed.get('token')
+        total = feed.get('total')
+        self.logger.info(f"OAI {self.set_spec}: {self.records} records"
+                         f"{f' / {total}' if total else ''} ({self.deleted} deleted skipped)")
+        if token:
+            # Checkpoint après chaque page: une reprise redemande la page suivante
+            self.checkpoints.set(self.harvest_key, {'token': token, 'records': self.records})
+            yield self.token_request(token)
+        else:
+            self.checkpoints.delete(self.harvest_key)
+            self.logger.info(f"OAI harvest {self.harvest_key} complete: {self.records} records")
+
+    def retry_later(self, response):
+        try:
+            delay = int(response.headers.get('Retry-After', b'').decode() or 30)
+        except ValueError:
+            delay = 30
+        delay = min(delay, self.max_retry_after)
+        self.logger.info(f"OAI-PMH flow control (503), retrying in {delay}s")
+        self.crawler.stats.inc_value('arxiv_oai/retry_after', spider=self)
+        meta = dict(response.meta)
+        # Un seul des deux applique l'attente: AdaptiveThrottle a déjà porté le délai du slot à
+        # Retry-After pour ce 503; sinon TokenBucketMiddleware attend sans bloquer le reactor
+        if not meta.pop('throttle_blocked', None):
+            meta['throttle_delay'] = delay
+        return response.request.replace(dont_filter=True, meta=meta)
+
+    def record_to_item(self, record):
+        item = ArticleItem()
+        item['source'] = 'arXiv'
+        item['mot_cle_recherche'] = record['set'] or self.set_spec
+        item['titre'] = ' '.join(record['title'].split()) if record['title'] else None
+        item['lien'] = f"http://arxiv.org/abs/{record['id']}" if record['id'] else None
+        item['auteurs'] = record['authors']
+        # created = date de la première version (2024-01-15)
+        item['annee'] = record['created'][:4] if record['created'] else None
+        item['date_pub'] = record['created']
+        item['abstract'] = ' '.join(record['abstract'].split()) if record['abstract'] else None
+        item['journal'] = ', '.join(record['categories']) if record['categories'] else None
+        # Country - random assignment for arXiv (no affiliation data in API)
+        item['country'] = random.choice(COUNTRIES)
+        return item
+
+
+def _text(elem):
+    return elem.text.strip() if elem is not None and elem.text else None
+
+
+def iter_oai_records(source, feed):
+    """Stream an OAI-PMH ListRecords response (arXiv metadata format).
+
+    Yields one dict per <record>; the resumption token, completeListSize and
+    any OAI error code are stored in feed. Records are cleared and detached
+    from <ListRecords> as soon as they are yielded.
+    """
+    list_records = None
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if elem.tag == OAI + 'ListRecords':
+                list_records = elem
+            continue
+        if elem.tag == OAI + 'record':
+            header = elem.find(OAI + 'header')
+            metadata = elem.find(f'{OAI}metadata/{ARXIV}arXiv')
+            record = {
+                'deleted': header is not None and header.get('status') == 'deleted',
+                'set': _text(header.find(OAI + 'setSpec')) if header is not None else None,
+                'id': None, 'title': None, 'abstract': None, 'created': None,
+                'authors': [], 'categories': [],
+            }
+            if metadata is not None:
+                for child in metadata:
+                    tag = child.tag
+                    if tag == ARXIV + 'id':
+                        record['id'] = _text(child)
+                    elif tag == ARXIV + 'title':
+                        record['title'] = _text(child)
+                    elif tag == ARXIV + 'abstract':
+                        record['abstract'] = _text(child)
+                    elif tag == ARXIV + 'created':
+                        record['created'] = _text(child)
+                    elif tag == ARXIV + 'categories':
+                        record['categories'] = (child.text or '').split()
+                    elif tag == ARXIV + 'authors':
+                        for author in child:
+                            name = ' '.join(filter(None, (_text(author.find(ARXIV + 'forenames')),
+                                                          _text(author.find(ARXIV + 'keyname')))))
+                            if name:
+                                record['authors'].append(name)
+            yield record
+            # Les <record> sont enfants de <ListRecords>, pas de la racine
+            elem.clear()
+            if list_records is not None:
+                list_records.remove(elem)
+        elif elem.tag == OAI + 'resumptionToken':
+            feed['token'] = _text(elem)
+            if elem.get('completeListSize'):
+                feed['total'] = int(elem.get('completeListSize'))
+        elif elem.tag == OAI + 'error':
+            feed['error'] = elem.get('code')
+            feed['error_message'] = _text(elem)
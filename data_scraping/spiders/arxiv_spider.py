@@ -1,8 +1,30 @@
 import scrapy
+from scrapy.utils.project import data_path
 from ..items import ArticleItem
+from ..checkpoints import CheckpointStore
+from ..throttle import results_empty
+from urllib.parse import quote_plus
 import xml.etree.ElementTree as ET
+import io
+import os
 import random
 
+ATOM = '{http://www.w3.org/2005/Atom}'
+OPENSEARCH = '{http://a9.com/-/spec/opensearch/1.1/}'
+FIELDS = {
+    ATOM + 'title': 'title',
+    ATOM + 'id': 'id',
+    ATOM + 'published': 'published',
+    ATOM + 'updated': 'updated',
+    ATOM + 'summary': 'summary',
+}
+COUNTRIES = [
+    'USA', 'China', 'UK', 'Germany', 'France', 'Japan', 'Canada',
+    'Australia', 'India', 'Italy', 'Spain', 'Netherlands', 'Switzerland',
+    'Sweden', 'South Korea', 'Brazil', 'Singapore', 'Israel'
+]
+
+
 class ArxivSpider(scrapy.Spider):
     name = "arxiv"
     
@@ -13,84 +35,214 @@ class ArxivSpider(scrapy.Spider):
         'Natural Language Processing', 'Distributed Systems', '5G Networks'
     ]
     
+    # Le débit est limité par TOKEN_BUCKETS (1 requête / 3 s sur export.arxiv.org)
     custom_settings = {
-        'DOWNLOAD_DELAY': 5,
-        'RANDOMIZE_DOWNLOAD_DELAY': True,
+        'DOWNLOAD_DELAY': 0,
         'CONCURRENT_REQUESTS': 1,
     }
 
+    base_url = "http://export.arxiv.org/api/query?search_query=all:{}&start={}&max_results={}"
+    incremental_sort = "&sortBy=lastUpdatedDate&sortOrder=descending"
+
+    def __init__(self, page_size=None, max_results=None, reset=False, incremental=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # scrapy crawl arxiv -a page_size=500 -a max_results=2000 -a reset=1
+        # scrapy crawl arxiv -a incremental=1  (seulement les entrées modifiées depuis le dernier passage)
+        self.page_size = int(page_size) if page_size else None
+        self.max_results = int(max_results) if max_results else None
+        self.reset = str(reset).lower() in ('1', 'true', 'yes')
+        self.incremental = None if incremental is None else str(incremental).lower() in ('1', 'true', 'yes')
+
     def start_requests(self):
-        base_url = "http://export.arxiv.org/api/query?search_query=all:{}&start=0&max_results=25"
+        self.page_size = self.page_size or self.settings.getint('ARXIV_PAGE_SIZE', 200)
+        self.max_results = self.max_results or self.settings.getint('ARXIV_MAX_RESULTS', 1000)
+        self.empty_retries = self.settings.getint('ARXIV_EMPTY_RETRIES', 3)
+        if self.incremental is None:
+            self.incremental = self.settings.getbool('ARXIV_INCREMENTAL', False)
+        directory = data_path(self.settings.get('ARXIV_STATE_DIR', 'arxiv'), createdir=True)
+
+        if self.incremental:
+            # Marque par mot-clé: entrée la plus récente vue au dernier passage complet
+            self.marks = CheckpointStore(os.path.join(directory, 'incremental.json'))
+            if self.reset:
+                self.marks.clear()
+            self.newest = {}
+            for keyword in self.keywords:
+                yield self.page_request(keyword, 0)
+            return
+
+        self.checkpoints = CheckpointStore(os.path.join(directory, 'checkpoints.json'))
+        if self.reset:
+            self.checkpoints.clear()
         
         for keyword in self.keywords:
-            url = base_url.format(keyword.replace(' ', '+'))
-            yield scrapy.Request(url, callback=self.parse, meta={'keyword': keyword})
+            state = self.checkpoints.get(keyword, {})
+            if state.get('done'):
+                self.logger.info(f"Keyword already harvested, skipping: {keyword}")
+                continue
+            if state.get('start'):
+                self.logger.info(f"Resuming {keyword} at start={state['start']}")
+            yield self.page_request(keyword, state.get('start', 0))
+
+    def page_request(self, keyword, start):
+        page_size = min(self.page_size, self.max_results - start)
+        url = self.base_url.format(quote_plus(keyword), start, page_size)
+        if self.incremental:
+            url += self.incremental_sort
+        return scrapy.Request(url, callback=self.parse, meta={'keyword': keyword, 'start': start})
+
+    def closed(self, reason):
+        # Moisson complète: la prochaine exécution repart de zéro
+        if self.incremental or not hasattr(self, 'checkpoints'):
+            return
+        if reason == 'finished' and all(self.checkpoints.get(k, {}).get('done') for k in self.keywords):
+            self.checkpoints.clear()
 
     def parse(self, response):
         keyword = response.meta['keyword']
+        start = response.meta.get('start', 0)
         
         self.logger.info(f"Processing arXiv for keyword: {keyword}")
         
-        # Parse XML response
+        # Parsing incrémental: chaque <entry> est libéré dès que son item est produit
+        feed = {}
+        count = 0
+        mark = self.marks.get(keyword) if self.incremental else None
+        reached_known = False
         try:
-            root = ET.fromstring(response.text)
-            ns = {'atom': 'http://www.w3.org/2005/Atom'}
-            
-            entries = root.findall('atom:entry', ns)
-            
-            self.logger.info(f"Found {len(entries)} articles for {keyword}")
-            
-            for idx, entry in enumerate(entries):
-                item = ArticleItem()
-                item['source'] = 'arXiv'
-                item['mot_cle_recherche'] = keyword
-                
-                # Title
-                title_elem = entry.find('atom:title', ns)
-                item['titre'] = title_elem.text.strip().replace('\n', ' ') if title_elem is not None else None
-                
-                # Link
-                link_elem = entry.find('atom:id', ns)
-                item['lien'] = link_elem.text.strip() if link_elem is not None else None
-                
-                # Authors
-                authors = entry.findall('atom:author/atom:name', ns)
-                item['auteurs'] = [author.text.strip() for author in authors if author.text]
-                
-                # Year - extract from published date
-                published = entry.find('atom:published', ns)
-                if published is not None and published.text:
-                    # Format: 2024-01-15T10:30:00Z
-                    year_text = published.text.strip()
-                    item['annee'] = year_text[:4]  # Extract first 4 characters (year)
-                else:
-                    item['annee'] = None
-                
-                # Abstract
-                summary = entry.find('atom:summary', ns)
-                item['abstract'] = summary.text.strip().replace('\n', ' ') if summary is not None else None
-                
-                # Journal/Category
-                categories = entry.findall('atom:category', ns)
-                if categories:
-                    item['journal'] = ', '.join([cat.get('term') for cat in categories if cat.get('term')])
-                else:
-                    item['journal'] = None
-                
-                # Country - random assignment for arXiv (no affiliation data in API)
-                item['country'] = random.choice([
-                    'USA', 'China', 'UK', 'Germany', 'France', 'Japan', 'Canada', 
-                    'Australia', 'India', 'Italy', 'Spain', 'Netherlands', 'Switzerland', 
-                    'Sweden', 'South Korea', 'Brazil', 'Singapore', 'Israel'
-                ])
-                
+            for entry in iter_atom_entries(io.BytesIO(response.body), feed):
+                count += 1
+                if mark and is_known(entry, mark):
+                    reached_known = True
+                    break
+                if self.incremental and keyword not in self.newest and entry['id']:
+                    self.newest[keyword] = {'id': entry['id'], 'updated': entry['updated']}
+                item = self.entry_to_item(entry, keyword)
                 if item.get('titre') and item.get('lien'):
-                    self.logger.info(f"[{idx+1}] Scraped: {item['titre'][:50]}...")
+                    self.logger.debug(f"[{count}] Scraped: {item['titre'][:50]}...")
                     yield item
                 else:
-                    self.logger.warning(f"[{idx+1}] Skipped - Title: {bool(item.get('titre'))}, Link: {bool(item.get('lien'))}")
-                    
-        except Exception as e:
-            self.logger.error(f"Error parsing XML for {keyword}: {str(e)}")
-            with open(f'debug_arxiv_{keyword.replace(" ", "_")}.xml', 'w', encoding='utf-8') as f:
-                f.write(response.text)
+                    self.logger.warning(f"[{count}] Skipped - Title: {bool(item.get('titre'))}, Link: {bool(item.get('lien'))}")
+        except ET.ParseError as e:
+            self.logger.error(f"Error parsing XML for {keyword} after {count} entries: {str(e)}")
+            with open(f'debug_arxiv_{keyword.replace(" ", "_")}.xml', 'wb') as f:
+                f.write(response.body)
+            return
+        
+        total = feed.get('total', 0)
+        self.logger.info(f"Found {count} articles for {keyword} (start={start}, total={total})")
+        
+        next_start = start + count
+        if not count and start < min(total, self.max_results):
+            # Page vide avant la fin des résultats: on redemande la page, le checkpoint reste à start
+            retry = self.retry_empty(response, keyword, start)
+            if retry is not None:
+                yield retry
+            elif self.incremental:
+                # Delta pas lu jusqu'au bout: la marque ne bouge pas
+                self.newest.pop(keyword, None)
+            return
+
+        if self.incremental:
+            # Trié par lastUpdatedDate décroissant: tout ce qui suit une entrée connue l'est aussi
+            done = reached_known or not count or next_start >= min(total, self.max_results)
+            if not done:
+                yield self.page_request(keyword, next_start)
+                return
+            # La marque n'avance qu'en fin de passe: une exécution interrompue refait tout le delta.
+            # Seulement si le delta a été lu en entier (entrée connue atteinte ou flux épuisé),
+            # jamais sur une page vide ni sur une passe coupée par max_results
+            if reached_known or (count and next_start >= total):
+                if keyword in self.newest:
+                    self.marks.set(keyword, self.newest.pop(keyword))
+            else:
+                self.newest.pop(keyword, None)
+                self.logger.warning(f"Incremental {keyword}: stopped at start={next_start} "
+                                    f"(max_results={self.max_results}) before reaching known records, "
+                                    f"mark not moved")
+            new = next_start - 1 if reached_known else next_start
+            self.logger.info(f"Incremental {keyword}: {new} new or updated entries"
+                             f"{' (reached known records)' if reached_known else ''}")
+            return
+
+        # Checkpoint par mot-clé: une moisson interrompue reprend à cette page
+        done = not count or next_start >= min(total, self.max_results)
+        self.checkpoints.set(keyword, {'start': next_start, 'done': done})
+        if not done:
+            yield self.page_request(keyword, next_start)
+
+    def retry_empty(self, response, keyword, start):
+        # Souvent un incident transitoire ou un blocage: AdaptiveThrottle recule avant la relance
+        self.crawler.signals.send_catch_log(results_empty, response=response, spider=self)
+        retries = response.meta.get('empty_retries', 0)
+        if retries >= self.empty_retries:
+            self.logger.warning(f"Empty page for {keyword} at start={start} after {retries} retries, "
+                                f"the next run resumes there")
+            return None
+        self.crawler.stats.inc_value('arxiv/empty_page_retries', spider=self)
+        request = self.page_request(keyword, start)
+        return request.replace(dont_filter=True, meta={**request.meta, 'empty_retries': retries + 1})
+
+    def entry_to_item(self, entry, keyword):
+        item = ArticleItem()
+        item['source'] = 'arXiv'
+        item['mot_cle_recherche'] = keyword
+        item['titre'] = entry['title'].replace('\n', ' ') if entry['title'] else None
+        item['lien'] = entry['id']
+        item['auteurs'] = entry['authors']
+        # Year - published format: 2024-01-15T10:30:00Z
+        item['annee'] = entry['published'][:4] if entry['published'] else None
+        item['abstract'] = entry['summary'].replace('\n', ' ') if entry['summary'] else None
+        item['journal'] = ', '.join(entry['categories']) if entry['categories'] else None
+        
+        # Country - random assignment for arXiv (no affiliation data in API)
+        item['country'] = random.choice(COUNTRIES)
+        return item
+
+
+def _text(elem):
+    return elem.text.strip() if elem.text else None
+
+
+def is_known(entry, mark):
+    # Timestamps ISO 8601 en UTC ('2024-01-15T10:30:00Z'): l'ordre lexical est l'ordre chronologique.
+    # L'entrée de la marque mise à jour depuis la dernière passe n'est pas connue
+    if entry['updated'] and mark.get('updated'):
+        return entry['updated'] <= mark['updated']
+    return entry['id'] == mark.get('id')
+
+
+def iter_atom_entries(source, feed):
+    """Stream an arXiv Atom feed, yielding one dict per <entry> as it closes.
+
+    opensearch:totalResults is stored in feed['total']. Processed entries are
+    removed from the tree so memory stays flat whatever the page size.
+    """
+    root = None
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if root is None:
+            root = elem
+            continue
+        if event != 'end':
+            continue
+        if elem.tag == OPENSEARCH + 'totalResults':
+            feed['total'] = int(elem.text) if elem.text else 0
+        elif elem.tag == ATOM + 'entry':
+            entry = {'title': None, 'id': None, 'published': None, 'updated': None,
+                     'summary': None, 'authors': [], 'categories': []}
+            # Une seule passe sur les enfants au lieu d'un find() par champ
+            for child in elem:
+                tag = child.tag
+                if tag == ATOM + 'author':
+                    name = child.findtext(ATOM + 'name')
+                    if name and name.strip():
+                        entry['authors'].append(name.strip())
+                elif tag == ATOM + 'category':
+                    term = child.get('term')
+                    if term:
+                        entry['categories'].append(term)
+                elif tag in FIELDS:
+                    entry[FIELDS[tag]] = _text(child)
+            yield entry
+            root.clear()
+
@@ -1,9 +1,21 @@
+from urllib.parse import urljoin
+
 import scrapy
+from scrapy.http import JsonRequest
+from w3lib.html import remove_tags
 from ..items import ArticleItem
+from ..throttle import results_empty
+import json
 import time
 import re
 import random
 
+# Les pages /document/<n>/ embarquent toutes les métadonnées dans ce script
+METADATA_MARKER = 'xplGlobal.document.metadata='
+# Liens d'articles toujours sur le site public, même si IEEE_API_URL pointe vers un stub/proxy
+SITE_URL = 'https://ieeexplore.ieee.org'
+_DECODER = json.JSONDecoder()
+
 class IeeeSpider(scrapy.Spider):
     name = "ieee"
     
@@ -17,28 +29,92 @@ class IeeeSpider(scrapy.Spider):
     custom_settings = {
         'DOWNLOAD_DELAY': 5,
         'RANDOMIZE_DOWNLOAD_DELAY': True,
-        'CONCURRENT_REQUESTS': 1,
+        # CONCURRENT_REQUESTS et DOWNLOAD_SLOTS: voir update_settings
     }
 
+    base_url = "https://ieeexplore.ieee.org/search/searchresult.jsp?newsearch=true&queryText={}&pageNumber={}"
+    # Endpoint JSON qui remplit la page de recherche (sans navigateur)
+    api_url = "https://ieeexplore.ieee.org/rest/search"
+    # Scraper jusqu'à 5 pages (125 articles en mode navigateur) par mot-clé
+    max_pages = 5
+    browser_page_size = 25
+
+    def __init__(self, mode=None, details=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # scrapy crawl ieee -a mode=browser  (force Selenium)
+        # scrapy crawl ieee -a details=1     (compléter chaque article depuis sa page /document/)
+        self.mode = mode
+        self.details = None if details is None else str(details).lower() in ('1', 'true', 'yes')
+
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+        # Recherche: un seul slot séquentiel; pages document: slot séparé à concurrence bornée
+        slots = dict(settings.getdict('DOWNLOAD_SLOTS'))
+        slots.setdefault('ieeexplore.ieee.org', {'concurrency': 1, 'delay': 5, 'randomize_delay': True})
+        slots.setdefault('ieee-documents', {
+            'concurrency': settings.getint('IEEE_DETAIL_CONCURRENCY', 4),
+            'delay': settings.getfloat('IEEE_DETAIL_DELAY', 1.0),
+            'randomize_delay': True,
+        })
+        settings.set('DOWNLOAD_SLOTS', slots, priority='spider')
+        settings.set('CONCURRENT_REQUESTS', 1 + slots['ieee-documents']['concurrency'], priority='spider')
+
     def start_requests(self):
-        base_url = "https://ieeexplore.ieee.org/search/searchresult.jsp?newsearch=true&queryText={}&pageNumber={}"
-        
+        self.mode = self.mode or self.settings.get('IEEE_SEARCH_MODE', 'api')
+        if self.details is None:
+            self.details = self.settings.getbool('IEEE_DETAIL_PAGES', False)
+        self.api_url = self.settings.get('IEEE_API_URL', self.api_url)
+        self.rows_per_page = self.settings.getint('IEEE_ROWS_PER_PAGE', 100)
         for keyword in self.keywords:
-            # Scraper les 5 premières pages (125 articles)
-            for page in range(1, 6):
-                url = base_url.format(keyword.replace(' ', '%20'), page)
-                yield scrapy.Request(
-                    url, 
-                    callback=self.parse, 
-                    meta={
-                        'keyword': keyword,
-                        'page': page,
-                        'selenium': True, 
-                        'wait_time': 10,
-                        'wait_selector': 'xpl-results-item'
-                    },
-                    dont_filter=True
-                )
+            if self.mode == 'api':
+                yield self.api_request(keyword, 1)
+            else:
+                yield self.search_request(keyword, 1)
+
+    def api_request(self, keyword, page):
+        payload = {
+            'newsearch': True,
+            'queryText': keyword,
+            'highlight': False,
+            'returnType': 'SEARCH',
+            'returnFacets': ['ALL'],
+            'rowsPerPage': self.rows_per_page,
+            'pageNumber': page,
+        }
+        return JsonRequest(
+            self.api_url,
+            data=payload,
+            callback=self.parse_api,
+            headers={
+                'Origin': 'https://ieeexplore.ieee.org',
+                'Referer': self.base_url.format(keyword.replace(' ', '%20'), page),
+            },
+            meta={
+                'keyword': keyword,
+                'page': page,
+                'handle_httpstatus_all': True,
+                'freshness_results': 'json:records.articleNumber'
+            },
+            dont_filter=True
+        )
+
+    def search_request(self, keyword, page):
+        url = self.base_url.format(keyword.replace(' ', '%20'), page)
+        return scrapy.Request(
+            url, 
+            callback=self.parse, 
+            meta={
+                'keyword': keyword,
+                'page': page,
+                'selenium': True, 
+                'wait_time': 10,
+                'wait_selector': 'xpl-results-item',
+                'extract_selector': 'xpl-results-item',
+                'freshness_results': 'xpl-results-item h3 a.fw-bold::attr(href)'
+            },
+            dont_filter=True
+        )
 
     def parse(self, response):
         keyword = response.meta['keyword']
@@ -59,6 +135,7 @@ class IeeeSpider(scrapy.Spider):
             self.logger.warning(f"No articles found. Saving HTML for debugging...")
             with open(f'debug_ieee_{keyword.replace(" ", "_")}.html', 'w', encoding='utf-8') as f:
                 f.write(response.text)
+            self.crawler.signals.send_catch_log(results_empty, response=response, spider=self)
             return
         
         for idx, article in enumerate(articles[:25]):
@@ -110,10 +187,137 @@ class IeeeSpider(scrapy.Spider):
             
             if item.get('titre') and item.get('lien'):
                 self.logger.info(f"[{idx+1}] Scraped: {item['titre'][:50]}...")
-                yield item
+                yield self.with_details(item)
             else:
                 self.logger.warning(f"[{idx+1}] Skipped - Title: {bool(item.get('titre'))}, Link: {bool(item.get('lien'))}")
+        
+        # Pagination séquentielle: inutile de continuer si la page n'a pas changé
+        if response.meta.get('freshness_unchanged'):
+            self.logger.info(f"Page {page} unchanged since last crawl, stopping pagination for {keyword}")
+        elif page < self.max_pages:
+            yield self.search_request(keyword, page + 1)
     
+    def parse_api(self, response):
+        keyword = response.meta['keyword']
+        page = response.meta.get('page', 1)
+
+        data = None
+        if response.status == 200:
+            try:
+                data = response.json()
+            except (ValueError, AttributeError):
+                pass
+        if not isinstance(data, dict):
+            yield self.browser_fallback(keyword, page, f"status {response.status}")
+            return
+
+        records = data.get('records') or []
+        self.logger.info(f"Found {len(records)} articles for {keyword} - API page {page} "
+                         f"(total {data.get('totalRecords', '?')})")
+        if not records:
+            # Réponse 200 sans résultat: souvent un blocage déguisé
+            self.crawler.signals.send_catch_log(results_empty, response=response, spider=self)
+
+        for idx, record in enumerate(records):
+            item = self.record_to_item(record, keyword, response)
+            if item.get('titre') and item.get('lien'):
+                self.logger.debug(f"[{idx+1}] Scraped: {item['titre'][:50]}...")
+                yield self.with_details(item)
+            else:
+                self.logger.warning(f"[{idx+1}] Skipped - Title: {bool(item.get('titre'))}, Link: {bool(item.get('lien'))}")
+
+        total_pages = data.get('totalPages') or 0
+        if response.meta.get('freshness_unchanged'):
+            self.logger.info(f"API page {page} unchanged since last crawl, stopping pagination for {keyword}")
+        elif records and page < min(self.max_pages, total_pages):
+            yield self.api_request(keyword, page + 1)
+
+    def browser_fallback(self, keyword, page, reason):
+        # Même position dans les résultats, en pages de 25 pour la recherche Selenium
+        browser_page = (page - 1) * self.rows_per_page // self.browser_page_size + 1
+        self.logger.warning(f"IEEE API unavailable for {keyword} ({reason}), "
+                            f"falling back to Selenium at page {browser_page}")
+        self.crawler.stats.inc_value('ieee/api_fallback', spider=self)
+        return self.search_request(keyword, browser_page)
+
+    def record_to_item(self, record, keyword, response):
+        item = ArticleItem()
+        item['source'] = 'IEEE'
+        item['mot_cle_recherche'] = keyword
+        item['topic'] = keyword
+        item['titre'] = ' '.join((record.get('articleTitle') or '').split())
+
+        # Même forme de lien que la page de recherche (/document/<n>/)
+        link = record.get('documentLink')
+        if not link and record.get('articleNumber'):
+            link = f"/document/{record['articleNumber']}/"
+        if link and not link.endswith('/'):
+            link += '/'
+        item['lien'] = urljoin(SITE_URL, link) if link else None
+
+        authors = [a.get('preferredName') or a.get('normalizedName') for a in record.get('authors') or []]
+        item['auteurs'] = list(dict.fromkeys(a.strip() for a in authors if a and a.strip()))
+        affiliations = [aff for a in record.get('authors') or [] for aff in a.get('affiliation') or []]
+        item['country'] = self.extract_country(' '.join(affiliations) if affiliations else None)
+
+        year = str(record.get('publicationYear') or '')
+        year_match = re.search(r'\b(19|20)\d{2}\b', year)
+        item['annee'] = year_match.group(0) if year_match else None
+        item['date_pub'] = record.get('publicationDate') or (f"Year: {year}" if year else None)
+
+        item['abstract'] = ' '.join((record.get('abstract') or '').split())
+        item['journal'] = ' '.join((record.get('publicationTitle') or '').split())
+        item['latitude'] = None
+        item['longitude'] = None
+        return item
+
+    def with_details(self, item):
+        if not self.details:
+            return item
+        return scrapy.Request(
+            item['lien'],
+            callback=self.parse_document,
+            errback=self.document_failed,
+            cb_kwargs={'item': item},
+            meta={'keyword': item['mot_cle_recherche'], 'download_slot': 'ieee-documents'},
+            # Un article trouvé par plusieurs mots-clés: chaque copie doit atteindre le pipeline
+            # (fusion des mots_cles), le dupefilter ne doit pas l'écarter sans errback
+            dont_filter=True
+        )
+
+    def parse_document(self, response, item):
+        metadata = extract_document_metadata(response.text)
+        if metadata is None:
+            self.logger.debug(f"No embedded metadata on {response.url}")
+            self.crawler.stats.inc_value('ieee/document_without_metadata', spider=self)
+            yield item
+            return
+
+        abstract = metadata.get('abstract')
+        if abstract:
+            item['abstract'] = ' '.join(remove_tags(abstract).split())
+
+        affiliations = []
+        for author in metadata.get('authors') or []:
+            affiliation = author.get('affiliation') or []
+            affiliations.extend([affiliation] if isinstance(affiliation, str) else affiliation)
+        affiliations = list(dict.fromkeys(a.strip() for a in affiliations if a and a.strip()))
+        if affiliations:
+            item['affiliations'] = affiliations
+            item['country'] = self.extract_country(' '.join(affiliations))
+
+        date_pub = metadata.get('publicationDate') or metadata.get('onlineDate')
+        if date_pub:
+            item['date_pub'] = date_pub
+        if not item.get('annee') and metadata.get('publicationYear'):
+            item['annee'] = str(metadata['publicationYear'])
+        yield item
+
+    def document_failed(self, failure):
+        # Page document indisponible: l'article de la recherche est gardé tel quel
+        self.logger.debug(f"Document page failed: {failure.request.url} ({failure.value!r})")
+        yield failure.request.cb_kwargs['item']
+
     def extract_country(self, text):
         """Extract country from affiliation text or assign randomly"""
         countries = [
@@ -132,3 +336,22 @@ class IeeeSpider(scrapy.Spider):
         
         # If no country found or no text, return random country
         return random.choice(countries)
+
+
+def extract_document_metadata(text):
+    """Decode the JSON object assigned to xplGlobal.document.metadata, or None.
+
+    The object is located with str.find and decoded with raw_decode, so only
+    the metadata itself is parsed, not the rest of the page.
+    """
+    start = text.find(METADATA_MARKER)
+    if start < 0:
+        return None
+    start += len(METADATA_MARKER)
+    while start < len(text) and text[start].isspace():
+        start += 1
+    try:
+        metadata, _ = _DECODER.raw_decode(text, start)
+    except ValueError:
+        return None
+    return metadata if isinstance(metadata, dict) else None
@@ -1,7 +1,6 @@
 import scrapy
 from ..items import ArticleItem
-import time
-import random
+from ..throttle import results_empty
 
 class ScienceDirectSpider(scrapy.Spider):
     name = "sciencedirect"
@@ -22,12 +21,9 @@ class ScienceDirectSpider(scrapy.Spider):
     def start_requests(self):
         base_url = "https://www.sciencedirect.com/search?qs={}"
         
-        for idx, keyword in enumerate(self.keywords):
+        # L'espacement entre mots-clés est géré par AdaptiveThrottle (ADAPTIVE_THROTTLE)
+        for keyword in self.keywords:
             url = base_url.format(keyword.replace(' ', '%20'))
-            # Délai progressif entre les mots-clés
-            if idx > 0:
-                time.sleep(random.uniform(20, 30))
-            
             yield scrapy.Request(
                 url, 
                 callback=self.parse, 
@@ -35,7 +31,8 @@ class ScienceDirectSpider(scrapy.Spider):
                     'keyword': keyword, 
                     'pydoll': True,  # Utiliser PyDoll au lieu de Selenium
                     'wait_time': 15,
-                    'max_captcha_wait': 120
+                    'max_captcha_wait': 120,
+                    'freshness_results': 'div.result-item a::attr(href), article.js-article a::attr(href)'
                 },
                 dont_filter=True
             )
@@ -58,6 +55,7 @@ class ScienceDirectSpider(scrapy.Spider):
             self.logger.error("4. Essayez de scraper depuis un autre réseau")
             with open(f'captcha_sciencedirect_{keyword.replace(" ", "_")}.html', 'w', encoding='utf-8') as f:
                 f.write(response.text)
+            self.crawler.signals.send_catch_log(results_empty, response=response, spider=self)
             return
         
         # Try multiple selectors
@@ -75,6 +73,7 @@ class ScienceDirectSpider(scrapy.Spider):
             self.logger.warning(f"No articles found. Saving HTML for debugging...")
             with open(f'debug_sciencedirect_{keyword.replace(" ", "_")}.html', 'w', encoding='utf-8') as f:
                 f.write(response.text)
+            self.crawler.signals.send_catch_log(results_empty, response=response, spider=self)
             return
 
         for idx, article in enumerate(articles[:25]):
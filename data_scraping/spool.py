@@ -0,0 +1,181 @@
+import glob
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+SEALED_SUFFIX = '.ndjson.gz'
+OPEN_SUFFIX = '.ndjson.gz.part'
+CLAIMED_SUFFIX = '.ndjson.gz.claimed'
+# Segments illisibles mis de côté pour inspection, jamais rechargés automatiquement
+BAD_SUFFIX = '.ndjson.gz.bad'
+
+
+def encode_value(value):
+    if isinstance(value, datetime):
+        return {'$date': value.isoformat()}
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def decode_object(obj):
+    if len(obj) == 1 and '$date' in obj:
+        return datetime.fromisoformat(obj['$date'])
+    return obj
+
+
+def read_segment(path):
+    """Yield the documents of a segment, stopping cleanly at a truncated tail."""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line, object_hook=decode_object)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping corrupt line in {path}")
+    except (EOFError, gzip.BadGzipFile):
+        logger.warning(f"Segment {path} is truncated, loaded what was readable")
+
+
+def pending_segments(directory, include_open=False):
+    # .claimed et .part peuvent être en cours de chargement / d'écriture par un crawl en cours
+    suffixes = [SEALED_SUFFIX]
+    if include_open:
+        suffixes.extend([CLAIMED_SUFFIX, OPEN_SUFFIX])
+    paths = []
+    for suffix in suffixes:
+        paths.extend(glob.glob(os.path.join(directory, '*' + suffix)))
+    return sorted(paths)
+
+
+def claim_segment(path):
+    """Rename a sealed segment to .claimed; None if another drainer took it first."""
+    claimed = path[:-len(SEALED_SUFFIX)] + CLAIMED_SUFFIX
+    try:
+        os.replace(path, claimed)
+    except FileNotFoundError:
+        return None
+    return claimed
+
+
+class SpoolWriter:
+    """Append items to gzip NDJSON segments, sealed by rename when rotated."""
+
+    def __init__(self, directory, prefix, max_items=500, on_seal=None):
+        self.directory = directory
+        self.prefix = f"{prefix}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.max_items = max_items
+        self.on_seal = on_seal
+        self.sequence = 0
+        self.file = None
+        self.path = None
+        self.items = 0
+        self.opened_at = 0
+
+    def append(self, doc):
+        if self.file is None:
+            self.open_segment()
+        self.file.write(json.dumps(doc, default=encode_value, ensure_ascii=False))
+        self.file.write('\n')
+        self.items += 1
+        if self.items >= self.max_items:
+            self.seal()
+
+    def open_segment(self):
+        self.sequence += 1
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{self.prefix}-{self.sequence:06d}"
+        self.path = os.path.join(self.directory, name + OPEN_SUFFIX)
+        self.file = gzip.open(self.path, 'wt', encoding='utf-8')
+        self.items = 0
+        self.opened_at = time.monotonic()
+
+    def age(self):
+        return time.monotonic() - self.opened_at if self.file is not None else 0
+
+    def seal(self):
+        if self.file is None:
+            return
+        self.file.close()
+        os.replace(self.path, self.path[:-len(OPEN_SUFFIX)] + SEALED_SUFFIX)
+        self.file = None
+        self.path = None
+        if self.on_seal is not None:
+            self.on_seal()
+
+
+class SpoolDrainer(threading.Thread):
+    """Background thread loading sealed segments into Mongo through an ArticleWriter."""
+
+    def __init__(self, directory, writer, poll_interval=5.0, max_retry_delay=60.0):
+        super().__init__(name='spool-drainer', daemon=True)
+        self.directory = directory
+        self.writer = writer
+        self.poll_interval = poll_interval
+        self.max_retry_delay = max_retry_delay
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.index_checked = False
+        self.segments_loaded = 0
+
+    def run(self):
+        retry_delay = 1.0
+        while True:
+            stopping = self.stopping.is_set()
+            try:
+                self.drain()
+                retry_delay = 1.0
+                timeout = self.poll_interval
+            except PyMongoError as e:
+                logger.warning(f"MongoDB unavailable ({e}), items stay in spool, retrying in {retry_delay:.0f}s")
+                timeout = retry_delay
+                retry_delay = min(retry_delay * 2, self.max_retry_delay)
+            except Exception:
+                # Le thread ne doit jamais mourir: le pipeline continue d'écrire dans le spool
+                logger.exception(f"Spool drainer error, retrying in {retry_delay:.0f}s")
+                timeout = retry_delay
+                retry_delay = min(retry_delay * 2, self.max_retry_delay)
+            if stopping:
+                return
+            self.wakeup.wait(timeout)
+            self.wakeup.clear()
+
+    def drain(self):
+        for path in sorted(glob.glob(os.path.join(self.directory, '*' + SEALED_SUFFIX))):
+            claimed = claim_segment(path)
+            if claimed is None:
+                continue  # pris par un autre drainer
+            try:
+                tally = self.load(claimed)
+            except PyMongoError:
+                os.replace(claimed, path)
+                raise
+            except Exception as e:
+                bad = path[:-len(SEALED_SUFFIX)] + BAD_SUFFIX
+                logger.error(f"Cannot load spool segment {path} ({e!r}), moved to {bad}")
+                os.replace(claimed, bad)
+                continue
+            os.remove(claimed)
+            # Compté une seule fois, après suppression: un segment rejoué n'est pas compté deux fois
+            self.writer.commit(tally)
+            self.segments_loaded += 1
+
+    def load(self, path):
+        if not self.index_checked:
+            self.writer.check_index()
+            self.index_checked = True
+        return self.writer.write(list(read_segment(path)))
+
+    def notify(self):
+        self.wakeup.set()
+
+    def stop(self, timeout=None):
+        self.stopping.set()
+        self.wakeup.set()
+        self.join(timeout)
@@ -0,0 +1,146 @@
+import logging
+import time
+from datetime import datetime, timezone
+
+import pymongo
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from .metrics import count, observe
+
+logger = logging.getLogger(__name__)
+
+
+class ArticleWriter:
+    """Upsert-merge articles into Mongo with unordered bulk writes.
+
+    Articles are keyed by their canonical lien: new links are inserted with
+    $setOnInsert, and the keywords, links and sources of every copy are
+    merged into mots_cles, liens and sources with $addToSet. An upsert that
+    loses a race on the same lien (E11000) is retried once, as an update.
+
+    write() returns a tally of the batch; counters and stats only change in
+    commit(tally), once the caller knows the batch is done. If a write
+    raises, nothing is counted and the caller still holds the documents.
+    """
+
+    def __init__(self, collection, batch_size=500, stats=None, source=None):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.stats = stats
+        self.source = source
+        self.items_inserted = 0
+        self.duplicates_merged = 0
+        self.write_errors = 0
+        self.bulk_writes = 0
+
+    def check_index(self):
+        # Vérification en temps constant: la déduplication complète est une
+        # migration ponctuelle (scrapy dedup_articles), pas une étape du crawl
+        index = self.collection.index_information().get('lien_1')
+        if index is not None and index.get('unique'):
+            return
+        if index is not None:
+            logger.warning("Index lien_1 is not unique, run 'scrapy dedup_articles' to repair it")
+            return
+        try:
+            self.collection.create_index('lien', unique=True)
+        except pymongo.errors.OperationFailure as e:
+            logger.error(f"Cannot create unique index on lien ({e}), run 'scrapy dedup_articles' first")
+
+    def write(self, docs):
+        # Le même article trouvé sous plusieurs mots-clés ou sources ne fait qu'une
+        # seule écriture, sur le document canonique (voir NearDuplicatePipeline)
+        grouped = {}
+        for doc in docs:
+            lien = doc.get('lien')
+            if not lien:
+                continue
+            key = doc.get('canonical_lien') or lien
+            entry = grouped.get(key)
+            if entry is None:
+                entry = grouped[key] = {'key': key, 'doc': doc, 'keywords': [], 'liens': [],
+                                        'sources': [], 'count': 0}
+            elif lien == key:
+                entry['doc'] = doc
+            for field, value in (('keywords', doc.get('mot_cle_recherche')), ('liens', lien),
+                                 ('sources', doc.get('source'))):
+                if value and value not in entry[field]:
+                    entry[field].append(value)
+            entry['count'] += 1
+
+        tally = {'inserted': 0, 'merged': 0, 'errors': 0, 'bulk_writes': 0, 'seconds': []}
+        entries = list(grouped.values())
+        for start in range(0, len(entries), self.batch_size):
+            self.bulk_upsert(entries[start:start + self.batch_size], tally)
+        return tally
+
+    def commit(self, tally):
+        self.items_inserted += tally['inserted']
+        self.duplicates_merged += tally['merged']
+        self.write_errors += tally['errors']
+        self.bulk_writes += tally['bulk_writes']
+        if self.stats is not None:
+            for seconds in tally['seconds']:
+                observe(self.stats, 'db_flush_seconds', seconds, source=self.source)
+            count(self.stats, 'db_items_inserted_total', tally['inserted'], source=self.source)
+            count(self.stats, 'db_items_merged_total', tally['merged'], source=self.source)
+
+    def bulk_upsert(self, entries, tally):
+        items = sum(entry['count'] for entry in entries)
+        start = time.perf_counter()
+        upserted, failed_items, duplicates = self.bulk_write(entries)
+        if duplicates:
+            # Upsert concurrent du même lien (autre drainer ou worker): E11000 pour le perdant.
+            # Le document existe maintenant, le second essai devient une mise à jour
+            logger.debug(f"Retrying {len(duplicates)} upserts after duplicate key errors")
+            retried, retry_failed, still_duplicates = self.bulk_write(duplicates)
+            upserted += retried
+            failed_items += retry_failed + sum(entry['count'] for entry in still_duplicates)
+            for entry in still_duplicates:
+                logger.error(f"Mongo write error: duplicate key on {entry['key']} after retry")
+        # Autres erreurs (réseau, sélection du serveur): l'exception remonte, rien n'est compté
+
+        # Chaque upsert inséré compte pour un item, tout le reste a été fusionné
+        tally['bulk_writes'] += 1
+        tally['inserted'] += upserted
+        tally['merged'] += items - upserted - failed_items
+        tally['errors'] += failed_items
+        tally['seconds'].append(time.perf_counter() - start)
+        logger.debug(f"Flushed {len(entries)} upserts for {items} items")
+
+    def bulk_write(self, entries):
+        """One unordered bulk write: (upserted, failed items, entries hit by E11000)."""
+        operations = [self.build_upsert(entry) for entry in entries]
+        try:
+            result = self.collection.bulk_write(operations, ordered=False)
+            return result.upserted_count, 0, []
+        except BulkWriteError as e:
+            details = e.details
+        failed_items = 0
+        duplicates = []
+        for error in details.get('writeErrors', []):
+            entry = entries[error['index']]
+            if error.get('code') == 11000:
+                duplicates.append(entry)
+                continue
+            failed_items += entry['count']
+            logger.error(f"Mongo write error: {error.get('errmsg')}")
+        return details.get('nUpserted', 0), failed_items, duplicates
+
+    def build_upsert(self, entry):
+        insert_fields = {k: v for k, v in entry['doc'].items() if k not in ('lien', 'canonical_lien')}
+        return UpdateOne(
+            {'lien': entry['key']},
+            {
+                '$setOnInsert': insert_fields,
+                '$addToSet': {
+                    'mots_cles': {'$each': entry['keywords']},
+                    'liens': {'$each': entry['liens']},
+                    'sources': {'$each': entry['sources']}
+                },
+                # Watermark de l'ETL incrémental: change à chaque insertion ou fusion
+                '$set': {'date_maj': datetime.now(timezone.utc)}
+            },
+            upsert=True
+        )
@@ -76,9 +76,15 @@ def run_spider(spider_name):
     script_path = os.path.expanduser("~/BigData-Research-Pipeline/data_scraping")
     venv_python = os.path.expanduser("~/BigData-Research-Pipeline/venv/bin/python")
 
+    # "all": tous les spiders dans un seul processus Scrapy (scrapy crawl_all)
+    if spider_name == "all":
+        command = [venv_python, "-m", "scrapy", "crawl_all"]
+    else:
+        command = [venv_python, "-m", "scrapy", "crawl", spider_name]
+
     try:
         process = subprocess.Popen(
-            [venv_python, "-m", "scrapy", "crawl", spider_name],
+            command,
             cwd=script_path,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -183,7 +189,8 @@ elif page == "Scraping":
             "arxiv": "ArXiv (Recommandé)",
             "ieee": "IEEE Xplore (Nécessite Chrome)",
             "acm": "ACM Digital Library (Peut être bloqué)",
-            "sciencedirect": "ScienceDirect (Souvent bloqué)"
+            "sciencedirect": "ScienceDirect (Souvent bloqué)",
+            "all": "Tous en parallèle (arxiv + ieee + scholar)"
         }
 
         selected_spider = st.selectbox(
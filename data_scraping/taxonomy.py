@@ -0,0 +1,110 @@
+import re
+
+# Groupes par ordre de priorité, mêmes mots-clés que regrouper_categories du notebook
+GROUPS = (
+    ('Blockchain', ['blockchain']),
+    ('Deep Learning', [
+        'deep learning', 'neural', 'artificial intelligence', 'machine learning',
+        'computer vision', 'natural language', 'reinforcement', 'supervised',
+        'classification', 'regression', 'clustering', 'random forest', 'decision tree',
+        'support vector', 'cnn', 'rnn', 'transfer learning', 'feature engineering',
+        'optimization', 'ensemble', 'gradient boosting'
+    ]),
+    ('Big Data', [
+        'big data', 'data science', 'data mining', 'analytics', 'time series',
+        'dimensionality', 'anomaly', 'internet of things', 'cloud', 'distributed',
+        '5g', 'security', 'cybersecurity'
+    ]),
+)
+DEFAULT_GROUP = 'Big Data'
+
+
+def _alternation(keywords):
+    # Les plus longs d'abord pour qu'un mot-clé ne soit pas masqué par un préfixe
+    return '|'.join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+
+
+class Taxonomy:
+    """Keyword -> group matcher compiled into a single regular expression.
+
+    Matching is substring-based on lowercased text, like the notebook. labels()
+    returns every group found (multi-label); classify() keeps the one with the
+    highest priority, falling back to the default group.
+    """
+
+    def __init__(self, groups=GROUPS, default=DEFAULT_GROUP):
+        self.groups = [name for name, _ in groups]
+        self.default = default
+        self.group_of = {keyword: name for name, keywords in groups for keyword in keywords}
+        self.priority = {name: i for i, name in enumerate(self.groups)}
+        # Lookahead: les correspondances qui se chevauchent sont toutes trouvées en une passe
+        self.pattern = re.compile(f'(?=({_alternation(self.group_of)}))')
+        self.group_patterns = {name: _alternation(keywords) for name, keywords in groups}
+
+    def labels(self, *texts):
+        text = ' '.join(str(t) for t in texts if t).lower()
+        found = {self.group_of[m.group(1)] for m in self.pattern.finditer(text)}
+        return sorted(found, key=self.priority.__getitem__)
+
+    def classify(self, text):
+        labels = self.labels(text)
+        return labels[0] if labels else self.default
+
+    def classify_item(self, item):
+        """Return (categorie, categories) for an ArticleItem or raw document."""
+        keyword = item.get('mot_cle_recherche')
+        labels = self.labels(keyword, item.get('titre'), item.get('abstract'))
+        primary = self.labels(keyword)
+        if primary:
+            return primary[0], labels
+        if not labels:
+            # Aucune règle: categorie et categories portent toutes deux la valeur par défaut
+            return self.default, [self.default]
+        return labels[0], labels
+
+    def labels_frame(self, series):
+        """One boolean column per group for a pandas Series of text."""
+        import pandas as pd
+
+        text = series.fillna('').astype(str).str.lower()
+        return pd.DataFrame({
+            name: text.str.contains(pattern, regex=True)
+            for name, pattern in self.group_patterns.items()
+        }, index=series.index)
+
+    def classify_series(self, series):
+        """Vectorized classify() over a pandas Series."""
+        import pandas as pd
+
+        flags = self.labels_frame(series)
+        result = pd.Series(self.default, index=series.index, dtype=object)
+        # Du moins prioritaire au plus prioritaire: le dernier masque appliqué gagne
+        for name in reversed(self.groups):
+            result[flags[name]] = name
+        return result
+
+    def classify_arrow(self, array):
+        """Vectorized classify() over a pyarrow string Array or ChunkedArray."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        text = pc.utf8_lower(pc.fill_null(array, ''))
+        result = pa.scalar(self.default)
+        for name in reversed(self.groups):
+            mask = pc.match_substring_regex(text, self.group_patterns[name])
+            result = pc.if_else(mask, pa.scalar(name), result)
+        return result
+
+
+TAXONOMY = Taxonomy()
+
+
+class TaxonomyPipeline:
+    """Fill categorie (single group) and categories (all groups) on every item."""
+
+    def __init__(self, taxonomy=TAXONOMY):
+        self.taxonomy = taxonomy
+
+    def process_item(self, item, spider):
+        item['categorie'], item['categories'] = self.taxonomy.classify_item(item)
+        return item
@@ -0,0 +1,215 @@
+import time
+
+from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.http import HtmlResponse
+from scrapy.utils.httpobj import urlparse_cached
+from twisted.internet.error import ConnectError, DNSLookupError
+from twisted.internet.task import deferLater
+
+from .metrics import count
+from .shared import SHARED
+from .rendering import is_captcha
+
+# Signal envoyé par les spiders quand une page de résultats attendue est vide
+results_empty = object()
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self):
+        """Take one token and return how many seconds to wait before using it."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # Les jetons peuvent devenir négatifs: chaque requête réserve son créneau
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+
+
+class TokenBucketMiddleware:
+    """Per-domain request rate limit (TOKEN_BUCKETS) that never blocks the reactor.
+
+    TOKEN_BUCKETS = {'export.arxiv.org': {'rate': 1 / 3, 'burst': 1}} allows one
+    request every three seconds; waiting requests are delayed with a Deferred.
+    A request can ask for a longer wait with meta['throttle_delay'] (seconds),
+    e.g. to honour a Retry-After header.
+
+    The token is given back when the request never reached the server
+    (IgnoreRequest, DNS or connection failure). Any other error or response
+    consumes it on purpose: the site did see the request.
+    """
+
+    def __init__(self, buckets, stats):
+        self.buckets = buckets
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        config = crawler.settings.getdict('TOKEN_BUCKETS')
+        if not config:
+            raise NotConfigured
+        # Un seau par domaine pour tout le processus: plusieurs spiders partagent la limite
+        buckets = {
+            domain: SHARED.acquire(('token_bucket', domain), lambda params=params: TokenBucket(
+                float(params['rate']), float(params.get('burst', 1))))
+            for domain, params in config.items()
+        }
+        return cls(buckets, crawler.stats)
+
+    def process_request(self, request, spider):
+        bucket = self.buckets.get(urlparse_cached(request).hostname)
+        delay = 0.0
+        if bucket is not None:
+            delay = bucket.reserve()
+            request.meta['token_bucket'] = True
+        delay = max(delay, float(request.meta.get('throttle_delay') or 0))
+        if delay <= 0:
+            return None
+        self.stats.inc_value('token_bucket/delayed', spider=spider)
+        from twisted.internet import reactor
+        return deferLater(reactor, delay, lambda: None)
+
+    def process_exception(self, request, exception, spider):
+        if not request.meta.pop('token_bucket', False):
+            return None
+        if isinstance(exception, (IgnoreRequest, DNSLookupError, ConnectError)):
+            self.buckets[urlparse_cached(request).hostname].refund()
+            self.stats.inc_value('token_bucket/refunded', spider=spider)
+        return None
+
+
+class DomainController:
+    """Delay and concurrency of one download slot.
+
+    Every healthy response shortens the delay by `speedup` down to min_delay,
+    and `grow_after` healthy responses in a row allow one more concurrent
+    request. A blocked response resets concurrency to 1 and multiplies the
+    delay by `backoff` (at least Retry-After), up to max_delay.
+    """
+
+    def __init__(self, delay, min_delay=1.0, max_delay=300.0, max_concurrency=1, speedup=0.9,
+                 backoff=2.0, grow_after=10):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_concurrency = max_concurrency
+        self.speedup = speedup
+        self.backoff = backoff
+        self.grow_after = grow_after
+        self.delay = min(max_delay, max(min_delay, delay))
+        self.concurrency = 1
+        self.healthy = 0
+
+    def on_healthy(self):
+        self.healthy += 1
+        self.delay = max(self.min_delay, self.delay * self.speedup)
+        if self.healthy >= self.grow_after and self.concurrency < self.max_concurrency:
+            self.concurrency += 1
+            self.healthy = 0
+
+    def on_blocked(self, retry_after=0.0):
+        self.healthy = 0
+        self.concurrency = 1
+        self.delay = min(self.max_delay, max(max(self.delay, self.min_delay, 1.0) * self.backoff, retry_after))
+
+
+class AdaptiveThrottle:
+    """Per-domain delay/concurrency controller driven by response health.
+
+    ADAPTIVE_THROTTLE = {'default': {...}, 'www.sciencedirect.com': {'min_delay': 10}}
+    gives the DomainController parameters of each download slot (domain or
+    meta['download_slot']). The starting delay is the slot's DOWNLOAD_DELAY.
+    Blocks are 429/503 responses, CAPTCHA pages and the results_empty signal.
+    Only the downloader slots are changed, the event loop is never blocked.
+    """
+
+    def __init__(self, crawler, config):
+        self.crawler = crawler
+        self.default = config.get('default', {})
+        self.config = config
+        self.controllers = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('ADAPTIVE_THROTTLE_ENABLED', True):
+            raise NotConfigured
+        extension = cls(crawler, crawler.settings.getdict('ADAPTIVE_THROTTLE'))
+        crawler.signals.connect(extension.response_received, signal=signals.response_received)
+        crawler.signals.connect(extension.results_empty, signal=results_empty)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def controller(self, key, slot):
+        controller = self.controllers.get(key)
+        if controller is None:
+            params = {**self.default, **self.config.get(key, {})}
+            controller = self.controllers[key] = DomainController(slot.delay, **params)
+        return controller
+
+    def slot(self, request):
+        key = request.meta.get('download_slot') or urlparse_cached(request).hostname
+        return key, self.crawler.engine.downloader.slots.get(key)
+
+    def blocked_reason(self, response, request):
+        if response.status in (429, 503):
+            return str(response.status)
+        if request.meta.get('selenium_outcome', {}).get('captcha') or response.headers.get('cf-mitigated'):
+            return 'captcha'
+        if isinstance(response, HtmlResponse):
+            title = (response.css('title::text').get() or '').lower()
+            if is_captcha(title) or 'just a moment' in title or 'access denied' in title:
+                return 'captcha'
+        return None
+
+    def response_received(self, response, request, spider):
+        key, slot = self.slot(request)
+        if slot is None:
+            return
+        controller = self.controller(key, slot)
+        reason = self.blocked_reason(response, request)
+        if reason is None:
+            controller.on_healthy()
+        else:
+            # Le spider peut aussi signaler ce blocage (results_empty): un seul recul par réponse
+            request.meta['throttle_blocked'] = reason
+            try:
+                retry_after = float(response.headers.get('Retry-After', b'0').decode() or 0)
+            except ValueError:
+                retry_after = 0.0
+            self.backoff(key, slot, controller, reason, retry_after, spider)
+        self.apply(key, slot, controller)
+
+    def results_empty(self, response, spider):
+        if response.meta.get('throttle_blocked'):
+            return
+        key, slot = self.slot(response.request)
+        if slot is None:
+            return
+        response.meta['throttle_blocked'] = 'empty'
+        controller = self.controller(key, slot)
+        self.backoff(key, slot, controller, 'empty', 0.0, spider)
+        self.apply(key, slot, controller)
+
+    def backoff(self, key, slot, controller, reason, retry_after, spider):
+        controller.on_blocked(retry_after)
+        count(self.crawler.stats, 'throttle_backoff_total', source=spider.name, domain=key, reason=reason)
+        spider.logger.warning(f"Throttle {key}: {reason}, delay now {controller.delay:.1f}s")
+
+    def apply(self, key, slot, controller):
+        slot.delay = controller.delay
+        slot.concurrency = controller.concurrency
+        self.crawler.stats.set_value(f'throttle/delay/{key}', round(controller.delay, 2))
+        self.crawler.stats.set_value(f'throttle/concurrency/{key}', controller.concurrency)
+
+    def spider_closed(self, spider):
+        for key, controller in sorted(self.controllers.items()):
+            spider.logger.info(f"Throttle {key}: final delay {controller.delay:.1f}s, "
+                               f"concurrency {controller.concurrency}")
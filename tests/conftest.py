@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from scrapy import Request
+from scrapy.http import TextResponse
+from scrapy.utils.test import get_crawler
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+def respond(request, body=b'', status=200, headers=None):
+    return TextResponse(request.url, status=status, headers=headers, body=body, encoding='utf-8',
+                        request=request)
+
+
+def make_spider(spidercls, settings=None, attrs=None, **kwargs):
+    """Spider bound to a test crawler; attrs stands in for what start_requests reads from settings."""
+    crawler = get_crawler(spidercls, settings)
+    spider = spidercls.from_crawler(crawler, **kwargs)
+    for name, value in (attrs or {}).items():
+        setattr(spider, name, value)
+    return spider
+
+
+def split(output):
+    """(items, requests) of a callback's output."""
+    return ([o for o in output if not isinstance(o, Request)],
+            [o for o in output if isinstance(o, Request)])
+
+
+ATOM_FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">
+  <opensearch:totalResults>{total}</opensearch:totalResults>
+{entries}</feed>
+"""
+ATOM_ENTRY = """  <entry>
+    <id>http://arxiv.org/abs/2401.{n:05d}v1</id>
+    <updated>2024-01-15T10:30:00Z</updated>
+    <published>2024-01-15T10:30:00Z</published>
+    <title>Stub article {n}</title>
+    <summary>Abstract {n}.</summary>
+    <author><name>Author {n}</name></author>
+  </entry>
+"""
+
+
+class AtomStubHandler(BaseHTTPRequestHandler):
+    """arXiv API stand-in: `total` results per query, paginated on start/max_results."""
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        start = int(query.get('start', ['0'])[0])
+        max_results = int(query.get('max_results', ['10'])[0])
+        self.server.hits.append((time.monotonic(), query.get('search_query', [''])[0], start, max_results))
+        entries = ''.join(ATOM_ENTRY.format(n=n) for n in range(start, min(start + max_results,
+                                                                            self.server.total)))
+        body = ATOM_FEED.format(total=self.server.total, entries=entries).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/atom+xml; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def atom_server():
+    """Local arXiv API stub; server.hits lists (time, search_query, start, max_results)."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), AtomStubHandler)
+    server.total = 5
+    server.hits = []
+    server.base_url = (f'http://127.0.0.1:{server.server_port}/api/query'
+                       '?search_query=all:{}&start={}&max_results={}')
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,150 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from data_scraping.checkpoints import CheckpointStore
+from data_scraping.spiders.arxiv_spider import ArxivSpider
+from data_scraping.throttle import results_empty
+
+from .conftest import fixture, make_spider, respond, split
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Crawl réel (reactor, TokenBucketMiddleware) dans un processus à part: un seul mot-clé
+CRAWL = """
+import json, sys
+from scrapy.crawler import CrawlerProcess
+from data_scraping.spiders.arxiv_spider import ArxivSpider
+
+class StubArxivSpider(ArxivSpider):
+    keywords = ['Big Data']
+
+process = CrawlerProcess(json.loads(sys.argv[1]))
+process.crawl(StubArxivSpider, base_url=sys.argv[2])
+process.start()
+"""
+
+
+@pytest.fixture
+def spider(tmp_path):
+    return make_spider(ArxivSpider, page_size=3, max_results=1000, attrs={
+        'incremental': False,
+        'checkpoints': CheckpointStore(str(tmp_path / 'checkpoints.json')),
+        'empty_retries': 3,
+    })
+
+
+def page(spider, start=0, name='arxiv_feed.xml', retries=0):
+    request = spider.page_request('Big Data', start)
+    if retries:
+        request.meta['empty_retries'] = retries
+    return respond(request, fixture(name))
+
+
+def crawl(atom_server, tmp_path, rate=5.0):
+    items = tmp_path / 'items.jsonl'
+    settings = {
+        'ARXIV_STATE_DIR': str(tmp_path),
+        'ARXIV_PAGE_SIZE': 2,
+        'ARXIV_MAX_RESULTS': 5,
+        'DOWNLOADER_MIDDLEWARES': {'data_scraping.throttle.TokenBucketMiddleware': 690},
+        'TOKEN_BUCKETS': {'127.0.0.1': {'rate': rate, 'burst': 1}},
+        'FEEDS': {str(items): {'format': 'jsonlines'}},
+        'ROBOTSTXT_OBEY': False,
+        'TELNETCONSOLE_ENABLED': False,
+        'LOG_LEVEL': 'WARNING',
+    }
+    subprocess.run([sys.executable, '-c', CRAWL, json.dumps(settings), atom_server.base_url],
+                   cwd=ROOT, check=True, timeout=60)
+    with open(items, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_parse_paginates_and_checkpoints(spider):
+    items, requests = split(list(spider.parse(page(spider))))
+
+    assert len(items) == 3
+    assert ' '.join(items[0]['titre'].split()) == 'Streaming Joins over Big Data'
+    assert items[0]['annee'] == '2024'
+    assert items[0]['mot_cle_recherche'] == 'Big Data'
+    assert len(requests) == 1
+    assert requests[0].meta == {'keyword': 'Big Data', 'start': 3}
+    assert 'start=3&max_results=3' in requests[0].url
+    assert spider.checkpoints.get('Big Data') == {'start': 3, 'done': False}
+
+
+def test_empty_page_is_retried_not_done(spider):
+    spider.checkpoints.set('Big Data', {'start': 3, 'done': False})
+    received = []
+
+    def on_empty(response, spider):
+        received.append(response.meta['start'])
+
+    spider.crawler.signals.connect(on_empty, signal=results_empty)
+    output = list(spider.parse(page(spider, start=3, name='arxiv_empty.xml')))
+
+    # totalResults = 5 > 3: page vide transitoire, relue après le recul d'AdaptiveThrottle
+    assert received == [3]
+    assert len(output) == 1
+    assert output[0].dont_filter
+    assert output[0].meta == {'keyword': 'Big Data', 'start': 3, 'empty_retries': 1}
+    assert spider.checkpoints.get('Big Data') == {'start': 3, 'done': False}
+
+    # Relances épuisées: rien n'est marqué terminé, la prochaine exécution reprend à start=3
+    output = list(spider.parse(page(spider, start=3, name='arxiv_empty.xml', retries=3)))
+    assert output == []
+    assert spider.checkpoints.get('Big Data') == {'start': 3, 'done': False}
+
+
+def test_start_requests_resume_from_checkpoints(tmp_path):
+    store = CheckpointStore(str(tmp_path / 'checkpoints.json'))
+    store.set('Big Data', {'start': 3, 'done': False})
+    store.set('Data Science', {'start': 5, 'done': True})
+    spider = make_spider(ArxivSpider, settings={
+        'ARXIV_STATE_DIR': str(tmp_path), 'ARXIV_PAGE_SIZE': 3, 'ARXIV_MAX_RESULTS': 5,
+    })
+
+    requests = {r.meta['keyword']: r for r in spider.start_requests()}
+
+    # Mot-clé terminé ignoré, mot-clé interrompu repris à son checkpoint, les autres depuis 0
+    assert 'Data Science' not in requests
+    assert len(requests) == len(ArxivSpider.keywords) - 1
+    assert requests['Big Data'].meta['start'] == 3
+    assert 'start=3&max_results=2' in requests['Big Data'].url
+    assert requests['Machine Learning'].meta['start'] == 0
+
+
+def test_start_requests_reset_clears_checkpoints(tmp_path):
+    CheckpointStore(str(tmp_path / 'checkpoints.json')).set('Big Data', {'start': 3, 'done': True})
+    spider = make_spider(ArxivSpider, settings={'ARXIV_STATE_DIR': str(tmp_path)}, reset='1')
+
+    requests = {r.meta['keyword']: r for r in spider.start_requests()}
+
+    assert requests['Big Data'].meta['start'] == 0
+    assert spider.checkpoints.get('Big Data') is None
+
+
+def test_harvest_against_stub_server(atom_server, tmp_path):
+    items = crawl(atom_server, tmp_path)
+
+    assert sorted(i['lien'] for i in items) == [f'http://arxiv.org/abs/2401.{n:05d}v1' for n in range(5)]
+    assert [(query, start, size) for _, query, start, size in atom_server.hits] == [
+        ('all:Big Data', 0, 2), ('all:Big Data', 2, 2), ('all:Big Data', 4, 1),
+    ]
+    # TOKEN_BUCKETS: 5 requêtes/s, burst 1 -> au moins ~0,2 s entre deux pages
+    times = [hit[0] for hit in atom_server.hits]
+    assert min(b - a for a, b in zip(times, times[1:])) >= 0.15
+    # Moisson complète: les checkpoints sont effacés pour la prochaine exécution
+    assert CheckpointStore(str(tmp_path / 'checkpoints.json')).data == {}
+
+
+def test_interrupted_harvest_resumes_against_stub_server(atom_server, tmp_path):
+    CheckpointStore(str(tmp_path / 'checkpoints.json')).set('Big Data', {'start': 2, 'done': False})
+
+    items = crawl(atom_server, tmp_path)
+
+    assert [(start, size) for _, _, start, size in atom_server.hits] == [(2, 2), (4, 1)]
+    assert sorted(i['lien'] for i in items) == [f'http://arxiv.org/abs/2401.{n:05d}v1' for n in range(2, 5)]
@@ -0,0 +1,83 @@
+import pytest
+
+from data_scraping.checkpoints import CheckpointStore
+from data_scraping.spiders.arxiv_spider import ArxivSpider, is_known
+
+from .conftest import fixture, make_spider, respond, split
+
+MARK = {'id': 'http://arxiv.org/abs/2402.00002v1', 'updated': '2024-02-20T08:00:00Z'}
+# Plus ancienne que toute la page: le delta continue au-delà
+OLD_MARK = {'id': 'http://arxiv.org/abs/2301.00000v1', 'updated': '2023-01-01T00:00:00Z'}
+
+
+@pytest.fixture
+def spider(tmp_path):
+    return make_spider(ArxivSpider, page_size=3, max_results=1000, attrs={
+        'incremental': True,
+        'marks': CheckpointStore(str(tmp_path / 'incremental.json')),
+        'newest': {},
+        'empty_retries': 3,
+    })
+
+
+def page(spider, start=0, name='arxiv_feed.xml', retries=0):
+    request = spider.page_request('Big Data', start)
+    if retries:
+        request.meta['empty_retries'] = retries
+    return respond(request, fixture(name))
+
+
+def test_is_known():
+    assert is_known({'id': MARK['id'], 'updated': MARK['updated']}, MARK)
+    assert is_known({'id': 'http://arxiv.org/abs/2401.00001v1', 'updated': '2024-01-15T10:30:00Z'}, MARK)
+    assert not is_known({'id': 'http://arxiv.org/abs/2403.00003v2', 'updated': '2024-03-10T09:00:00Z'}, MARK)
+    # L'entrée de la marque, mise à jour depuis: elle doit être relue
+    assert not is_known({'id': MARK['id'], 'updated': '2024-04-01T00:00:00Z'}, MARK)
+    # Sans timestamp, seul l'identifiant compte
+    assert is_known({'id': MARK['id'], 'updated': None}, MARK)
+    assert not is_known({'id': 'other', 'updated': None}, MARK)
+
+
+def test_request_sorted_by_last_update(spider):
+    assert spider.page_request('Big Data', 0).url.endswith('&sortBy=lastUpdatedDate&sortOrder=descending')
+
+
+def test_stops_at_known_entry(spider):
+    spider.marks.set('Big Data', MARK)
+    output = list(spider.parse(page(spider)))
+
+    assert [o['lien'] for o in output] == ['http://arxiv.org/abs/2403.00003v2']
+    assert spider.marks.get('Big Data') == {'id': 'http://arxiv.org/abs/2403.00003v2',
+                                            'updated': '2024-03-10T09:00:00Z'}
+
+
+def test_rereads_updated_mark_entry(spider):
+    spider.marks.set('Big Data', {'id': 'http://arxiv.org/abs/2403.00003v2', 'updated': '2024-03-01T12:00:00Z'})
+    output = list(spider.parse(page(spider)))
+
+    assert [o['lien'] for o in output] == ['http://arxiv.org/abs/2403.00003v2']
+    assert spider.marks.get('Big Data')['updated'] == '2024-03-10T09:00:00Z'
+
+
+def test_keeps_mark_when_capped(spider):
+    spider.max_results = 3
+    spider.marks.set('Big Data', OLD_MARK)
+    items, requests = split(list(spider.parse(page(spider))))
+
+    assert len(items) == 3
+    assert requests == []
+    assert spider.marks.get('Big Data') == OLD_MARK
+
+
+def test_keeps_mark_on_empty_page(spider):
+    spider.marks.set('Big Data', OLD_MARK)
+    output = list(spider.parse(page(spider)))
+    assert output[-1].meta == {'keyword': 'Big Data', 'start': 3}
+
+    # Page vide au milieu du delta: relue, puis abandonnée sans avancer la marque
+    output = list(spider.parse(page(spider, start=3, name='arxiv_empty.xml')))
+    assert len(output) == 1 and output[0].meta['empty_retries'] == 1
+    output = list(spider.parse(page(spider, start=3, name='arxiv_empty.xml', retries=3)))
+    assert output == []
+    assert spider.marks.get('Big Data') == OLD_MARK
+    assert 'Big Data' not in spider.newest
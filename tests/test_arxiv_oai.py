@@ -0,0 +1,119 @@
+import io
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from data_scraping.checkpoints import CheckpointStore
+from data_scraping.spiders.arxiv_oai_spider import OAI, ArxivOaiSpider, iter_oai_records
+
+from .conftest import fixture, make_spider, respond, split
+
+BASE_URL = 'http://localhost:8000/oai2'
+
+
+@pytest.fixture
+def spider(tmp_path):
+    return make_spider(ArxivOaiSpider, set='cs', base_url=BASE_URL, attrs={
+        'max_retry_after': 600,
+        'checkpoints': CheckpointStore(str(tmp_path / 'oai.json')),
+        'harvest_key': 'cs||',
+    })
+
+
+def test_iter_oai_records():
+    feed = {}
+    records = list(iter_oai_records(io.BytesIO(fixture('oai_page1.xml')), feed))
+
+    assert feed == {'token': '6960524|1001', 'total': 3}
+    assert len(records) == 2
+    record, deleted = records
+    assert record['id'] == '2401.00001'
+    assert record['set'] == 'cs'
+    assert record['authors'] == ['Edgar F. Codd', 'Jim Gray']
+    assert record['categories'] == ['cs.DB', 'cs.DC']
+    assert record['created'] == '2024-01-15'
+    assert not record['deleted']
+    assert deleted['deleted'] and deleted['id'] is None
+
+
+def test_iter_oai_records_frees_the_tree(monkeypatch):
+    body = (b'<?xml version="1.0" encoding="UTF-8"?>'
+            b'<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/"><ListRecords>'
+            + b'<record><header><identifier>oai:arXiv.org:x</identifier><setSpec>cs</setSpec></header>'
+              b'</record>' * 2000
+            + b'<resumptionToken completeListSize="4000">6960524|2001</resumptionToken>'
+              b'</ListRecords></OAI-PMH>')
+    parsers = []
+    iterparse = ET.iterparse
+
+    def recording_iterparse(*args, **kwargs):
+        parser = iterparse(*args, **kwargs)
+        parsers.append(parser)
+        return parser
+
+    monkeypatch.setattr(ET, 'iterparse', recording_iterparse)
+    feed = {}
+    assert sum(1 for _ in iter_oai_records(io.BytesIO(body), feed)) == 2000
+
+    # Plus aucun <record> dans l'arbre: la mémoire ne dépend pas de la taille de la page
+    list_records = parsers[0].root.find(OAI + 'ListRecords')
+    assert list_records.findall(OAI + 'record') == []
+    assert feed == {'token': '6960524|2001', 'total': 4000}
+
+def test_resumption_loop(spider):
+
+    response = respond(spider.list_request(), fixture('oai_page1.xml'))
+    items, requests = split(list(spider.parse(response)))
+    assert [i['lien'] for i in items] == ['http://arxiv.org/abs/2401.00001']
+    assert items[0]['titre'] == 'Column Stores Revisited'
+    assert items[0]['abstract'] == 'Columns and more columns.'
+    assert items[0]['annee'] == '2024'
+    assert len(requests) == 1
+    assert requests[0].meta['resumption_token'] == '6960524|1001'
+    assert 'resumptionToken=6960524%7C1001' in requests[0].url
+    assert spider.checkpoints.get('cs||') == {'token': '6960524|1001', 'records': 1}
+
+    # Dernière page: resumptionToken vide, la moisson est terminée
+    items, requests = split(list(spider.parse(respond(requests[0], fixture('oai_page2.xml')))))
+    assert [i['lien'] for i in items] == ['http://arxiv.org/abs/2402.00003']
+    assert requests == []
+    assert spider.records == 2
+    assert spider.deleted == 1
+    assert spider.checkpoints.get('cs||') is None
+
+
+def test_bad_resumption_token_restarts_range(spider):
+    spider.checkpoints.set('cs||', {'token': 'expired', 'records': 10})
+    spider.records = 10
+
+    output = list(spider.parse(respond(spider.token_request('expired'), fixture('oai_bad_token.xml'))))
+    assert len(output) == 1
+    assert 'verb=ListRecords' in output[0].url and 'resumptionToken' not in output[0].url
+    assert spider.records == 0
+    assert spider.checkpoints.get('cs||') is None
+
+
+def test_retry_after_is_honoured(spider):
+    request = spider.token_request('6960524|1001')
+
+    output = list(spider.parse(respond(request, status=503, headers={'Retry-After': '120'})))
+    assert len(output) == 1
+    assert output[0].url == request.url
+    assert output[0].dont_filter
+    assert output[0].meta['throttle_delay'] == 120
+    assert output[0].meta['resumption_token'] == '6960524|1001'
+
+    output = list(spider.parse(respond(request, status=503, headers={'Retry-After': '86400'})))
+    assert output[0].meta['throttle_delay'] == 600
+
+
+def test_retry_after_left_to_adaptive_throttle(spider):
+    request = spider.token_request('6960524|1001')
+    # AdaptiveThrottle a vu ce 503 avant le callback et a déjà allongé le délai du slot
+    request.meta['throttle_blocked'] = '503'
+
+    output = list(spider.parse(respond(request, status=503, headers={'Retry-After': '120'})))
+    assert len(output) == 1
+    assert 'throttle_delay' not in output[0].meta
+    assert 'throttle_blocked' not in output[0].meta
+    assert output[0].meta['resumption_token'] == '6960524|1001'
@@ -0,0 +1,43 @@
+import io
+import xml.etree.ElementTree as ET
+
+from data_scraping.spiders.arxiv_spider import ATOM, iter_atom_entries
+
+from .conftest import fixture
+
+
+def test_iter_atom_entries():
+    feed = {}
+    entries = list(iter_atom_entries(io.BytesIO(fixture('arxiv_feed.xml')), feed))
+
+    assert feed['total'] == 5
+    assert [e['id'] for e in entries] == [
+        'http://arxiv.org/abs/2403.00003v2',
+        'http://arxiv.org/abs/2402.00002v1',
+        'http://arxiv.org/abs/2401.00001v1',
+    ]
+    first = entries[0]
+    assert first['authors'] == ['Ada Lovelace', 'Alan Turing']
+    assert first['categories'] == ['cs.DB', 'cs.DC']
+    assert first['updated'] == '2024-03-10T09:00:00Z'
+    assert first['published'] == '2024-03-01T12:00:00Z'
+    assert entries[2]['categories'] == []
+
+
+def test_iter_atom_entries_frees_the_tree(monkeypatch):
+    body = (b'<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom">'
+            + b'<entry><id>http://arxiv.org/abs/2401.00001v1</id><title>T</title></entry>' * 2000
+            + b'</feed>')
+    parsers = []
+    iterparse = ET.iterparse
+
+    def recording_iterparse(*args, **kwargs):
+        parser = iterparse(*args, **kwargs)
+        parsers.append(parser)
+        return parser
+
+    monkeypatch.setattr(ET, 'iterparse', recording_iterparse)
+    assert sum(1 for _ in iter_atom_entries(io.BytesIO(body), {})) == 2000
+
+    # Chaque <entry> est retirée de <feed> une fois produite
+    assert parsers[0].root.findall(ATOM + 'entry') == []
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from data_scraping.spiders.ieee_spider import IeeeSpider
+from data_scraping.throttle import results_empty
+
+from .conftest import fixture, make_spider, respond, split
+
+API_URL = 'http://localhost:8000/rest/search'
+
+
+@pytest.fixture
+def spider():
+    return make_spider(IeeeSpider, mode='api', details='0', attrs={'api_url': API_URL, 'rows_per_page': 100})
+
+
+def test_record_to_item(spider):
+    request = spider.api_request('Big Data', 1)
+    response = respond(request, fixture('ieee_search.json'))
+    records = json.loads(fixture('ieee_search.json'))['records']
+
+    item = spider.record_to_item(records[0], 'Big Data', response)
+    # Lien du site public, même quand IEEE_API_URL pointe vers un stub
+    assert item['lien'] == 'https://ieeexplore.ieee.org/document/10012345/'
+    assert item['titre'] == 'Federated Learning at Scale'
+    assert item['auteurs'] == ['Jane Doe', 'R. Roe']
+    assert item['annee'] == '2023'
+    assert item['date_pub'] == '12-15 Dec. 2023'
+    assert item['abstract'] == 'We scale federated learning.'
+    assert item['journal'] == 'IEEE International Conference on Big Data'
+    assert item['source'] == 'IEEE'
+    assert item['mot_cle_recherche'] == 'Big Data'
+
+    item = spider.record_to_item(records[1], 'Big Data', response)
+    assert item['lien'] == 'https://ieeexplore.ieee.org/document/10067890/'
+    assert item['date_pub'] == 'Year: 2024'
+
+    assert spider.record_to_item(records[2], 'Big Data', response)['lien'] is None
+
+
+def test_parse_api_paginates(spider):
+    items, requests = split(list(spider.parse_api(respond(spider.api_request('Big Data', 1),
+                                                          fixture('ieee_search.json')))))
+
+    assert [i['lien'] for i in items] == ['https://ieeexplore.ieee.org/document/10012345/',
+                                          'https://ieeexplore.ieee.org/document/10067890/']
+    assert len(requests) == 1
+    assert requests[0].url == API_URL
+    assert requests[0].meta['page'] == 2
+    assert json.loads(requests[0].body)['pageNumber'] == 2
+
+    # totalPages = 2: pas de page suivante après la deuxième
+    items, requests = split(list(spider.parse_api(respond(spider.api_request('Big Data', 2),
+                                                          fixture('ieee_search.json')))))
+    assert len(items) == 2
+    assert requests == []
+
+
+def test_parse_api_empty_page_signals_results_empty(spider):
+    received = []
+
+    def on_empty(response, spider):
+        received.append(response.url)
+
+    spider.crawler.signals.connect(on_empty, signal=results_empty)
+    body = json.dumps({'totalRecords': 0, 'totalPages': 0, 'records': []}).encode()
+    output = list(spider.parse_api(respond(spider.api_request('Big Data', 1), body)))
+
+    assert output == []
+    assert received == [API_URL]
+
+
+def test_parse_api_falls_back_to_browser(spider):
+    output = list(spider.parse_api(respond(spider.api_request('Big Data', 2), b'<html>blocked</html>',
+                                           status=403)))
+
+    assert len(output) == 1
+    assert output[0].meta['selenium']
+    # Page 2 de 100 résultats = page 5 de 25 résultats dans la recherche du site
+    assert output[0].meta['page'] == 5
+    assert 'pageNumber=5' in output[0].url
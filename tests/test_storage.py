@@ -0,0 +1,38 @@
+from pymongo.errors import BulkWriteError
+
+from data_scraping.storage import ArticleWriter
+
+
+class Result:
+    def __init__(self, upserted_count):
+        self.upserted_count = upserted_count
+
+
+class RacingCollection:
+    """First bulk write loses the race on index 0, like a concurrent drainer's upsert."""
+
+    def __init__(self):
+        self.calls = []
+
+    def bulk_write(self, operations, ordered=False):
+        self.calls.append(len(operations))
+        if len(self.calls) == 1:
+            raise BulkWriteError({'nUpserted': 1, 'writeErrors': [
+                {'index': 0, 'code': 11000, 'errmsg': 'E11000 duplicate key error'},
+                {'index': 2, 'code': 121, 'errmsg': 'Document failed validation'},
+            ]})
+        return Result(0)
+
+
+def test_duplicate_key_errors_are_retried_as_updates():
+    collection = RacingCollection()
+    writer = ArticleWriter(collection)
+    docs = [{'lien': f'http://arxiv.org/abs/2401.0000{i}', 'source': 'arXiv'} for i in range(3)]
+
+    tally = writer.write(docs)
+
+    # Seul l'upsert en E11000 est rejoué; l'erreur de validation reste une erreur
+    assert collection.calls == [3, 1]
+    assert tally['inserted'] == 1
+    assert tally['merged'] == 1
+    assert tally['errors'] == 1
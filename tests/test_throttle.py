@@ -0,0 +1,61 @@
+from scrapy import Request, Spider
+from scrapy.utils.test import get_crawler
+from twisted.internet.defer import Deferred
+from twisted.internet.error import ConnectError
+
+from data_scraping.throttle import TokenBucket, TokenBucketMiddleware
+
+ARXIV = 'http://export.arxiv.org/api/query?search_query=all:Big+Data&start=0&max_results=200'
+
+
+def middleware(rate=1 / 3, burst=1):
+    crawler = get_crawler()
+    return TokenBucketMiddleware({'export.arxiv.org': TokenBucket(rate, burst)}, crawler.stats)
+
+
+def test_bucket_spaces_requests():
+    bucket = TokenBucket(rate=1 / 3, burst=2)
+
+    # Burst consommé sans attente, puis chaque requête réserve le créneau suivant (3 s)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert 2.9 < bucket.reserve() <= 3.0
+    assert 5.9 < bucket.reserve() <= 6.0
+
+
+def test_middleware_delays_without_blocking():
+    mw = middleware()
+    spider = Spider('arxiv')
+
+    assert mw.process_request(Request(ARXIV), spider) is None
+    # Deux requêtes consécutives: la seconde attend son jeton dans un Deferred
+    delayed = mw.process_request(Request(ARXIV), spider)
+    assert isinstance(delayed, Deferred)
+    delayed.cancel()
+    delayed.addErrback(lambda failure: None)
+    # Autres domaines: pas de seau, pas d'attente
+    assert mw.process_request(Request('https://ieeexplore.ieee.org/rest/search'), spider) is None
+
+
+def test_throttle_delay_meta_waits_longer():
+    mw = middleware()
+    spider = Spider('arxiv')
+
+    delayed = mw.process_request(Request(ARXIV, meta={'throttle_delay': 120}), spider)
+    assert isinstance(delayed, Deferred)
+    delayed.cancel()
+    delayed.addErrback(lambda failure: None)
+
+
+def test_token_refunded_when_request_never_left():
+    mw = middleware()
+    spider = Spider('arxiv')
+    bucket = mw.buckets['export.arxiv.org']
+    request = Request(ARXIV)
+
+    assert mw.process_request(request, spider) is None
+    mw.process_exception(request, ConnectError(), spider)
+
+    # Jeton rendu: la requête suivante part sans attendre
+    assert bucket.reserve() == 0.0
+    assert mw.stats.get_value('token_bucket/refunded') == 1